@@ -1,9 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+import asyncio
+import hashlib
 import os
+import threading
+import time
+
+from .cache import MemoryBackend
+from .metrics import Histogram, LATENCY_BUCKETS
 
 # Load file .env
 load_dotenv()
@@ -13,7 +22,32 @@ SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key-untuk-dev")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cache auth untuk get_current_user: token yang sudah diverifikasi & data user per username
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+# Cost bcrypt. Hash lama dengan cost berbeda di-hash ulang otomatis saat login berikutnya.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Executor khusus bcrypt: worker sedikit (sisakan core untuk API lain) + antrean terbatas
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 1) // 2)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+_token_cache = MemoryBackend(AUTH_CACHE_MAX_ENTRIES) # sha256(token) -> username
+_principal_cache = MemoryBackend(AUTH_CACHE_MAX_ENTRIES) # username -> Principal
+
+
+@dataclass(frozen=True)
+class Principal:
+    """User yang sedang login. Snapshot ringan (bukan objek ORM) sehingga aman di-cache antar request."""
+    id: int
+    username: str
+    is_active: bool
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,9 +55,117 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordPoolBusyError(Exception):
+    pass
+
+
+class PasswordHashPool:
+    """
+    Menjalankan bcrypt (CPU ~200ms, melepas GIL) di thread pool sendiri, bukan di
+    threadpool FastAPI. Lonjakan login hanya mengantre di sini; jika antrean penuh
+    request ditolak (503) alih-alih membuat seluruh API melambat.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.pending = 0 # menunggu + sedang berjalan
+        self.running = 0
+        self.rejected = 0
+        self.queue_wait = Histogram(LATENCY_BUCKETS)
+        self.duration = Histogram(LATENCY_BUCKETS)
+
+    def _task(self, fn, args, enqueued: float):
+        started = time.perf_counter()
+        self.queue_wait.observe(started - enqueued)
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+            self.duration.observe(time.perf_counter() - started)
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolBusyError("Too many concurrent password operations")
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._task, fn, args, time.perf_counter())
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "running": self.running,
+            "queued": max(0, self.pending - self.running),
+            "rejected": self.rejected,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "duration_seconds": self.duration.snapshot(),
+        }
+
+
+password_pool = PasswordHashPool()
+
+async def verify_password_async(plain_password, hashed_password):
+    """
+    Return (valid, hash_baru). hash_baru terisi jika hash lama perlu di-upgrade
+    (mis. BCRYPT_ROUNDS berubah) dan harus disimpan pemanggil.
+    """
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await password_pool.run(pwd_context.hash, password)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """
+    Verifikasi JWT (signature + exp) lalu return 'sub'. Hasil verifikasi di-cache
+    maksimal TOKEN_CACHE_TTL_SECONDS dan tidak pernah melewati exp token itu sendiri.
+    Raise JWTError jika token tidak valid.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest() # Token mentah tidak disimpan di memori cache
+    username = _token_cache.get(key)
+    if username is not None:
+        return username
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    username = payload.get("sub")
+    if username is None:
+        return None
+
+    ttl = TOKEN_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _token_cache.set(key, username, ttl)
+    return username
+
+def get_cached_principal(username: str) -> Optional[Principal]:
+    return _principal_cache.get(username)
+
+def cache_principal(user) -> Principal:
+    principal = Principal(id=user.id, username=user.username, is_active=user.is_active is not False)
+    _principal_cache.set(principal.username, principal, PRINCIPAL_CACHE_TTL_SECONDS)
+    return principal
+
+def invalidate_principal(username: str):
+    """Dipanggil setelah data user (mis. is_active) berubah. Proses lain menyusul setelah TTL."""
+    _principal_cache.delete(username)
@@ -0,0 +1,125 @@
+"""
+Micro-batching untuk scoring single-lead (simulator AI).
+
+Request yang datang bersamaan dikumpulkan maksimal MAX_WAIT_MS atau
+MAX_BATCH_SIZE item, lalu diproses sebagai satu matriks dan hasilnya
+dikembalikan ke masing-masing pemanggil.
+"""
+import asyncio
+import os
+import time
+from typing import Callable, List
+
+from .metrics import Histogram, LATENCY_BUCKETS
+from .ml_service import ml_service
+
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", 5))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", 64))
+MICROBATCH_MAX_QUEUE = int(os.getenv("MICROBATCH_MAX_QUEUE", 1024))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class MicroBatcher:
+    def __init__(self, name: str, process_batch: Callable[[List], List],
+                 max_batch_size: int = MICROBATCH_MAX_SIZE,
+                 max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+                 max_queue: int = MICROBATCH_MAX_QUEUE):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.rejected = 0
+        self.isolated = 0 # Batch yang gagal lalu diulang per item
+
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    def _ensure_started(self):
+        # Queue & worker terikat ke event loop yang sedang berjalan
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name} queue is full")
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _, _ in batch]
+            # Scoring adalah kerja CPU: jalankan di thread agar event loop tetap responsif
+            results = await self._loop.run_in_executor(None, self._process, items)
+
+            self.batch_sizes.observe(len(batch))
+            now = time.perf_counter()
+            for (_, future, enqueued), result in zip(batch, results):
+                self.latency.observe(now - enqueued)
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _process(self, items: List) -> List:
+        """
+        Satu panggilan process_batch untuk semua item. Jika gagal (mis. satu record
+        tidak valid), ulangi per item supaya hanya request yang bermasalah yang gagal.
+        """
+        try:
+            return self.process_batch(items)
+        except Exception as e:
+            if len(items) == 1:
+                return [e]
+            self.isolated += 1
+
+        results = []
+        for item in items:
+            try:
+                results.extend(self.process_batch([item]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "rejected": self.rejected,
+            "isolated_batches": self.isolated,
+            "batch_size": self.batch_sizes.snapshot(),
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+predict_batcher = MicroBatcher("predict", ml_service.predict_many)
+explain_batcher = MicroBatcher("explain", ml_service.explain_many)
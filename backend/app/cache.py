@@ -0,0 +1,134 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Konfigurasi cache response (bisa diatur lewat .env)
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 30))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+
+
+class CacheBackend(ABC):
+    """
+    Interface backend cache. Implementasi lain (mis. Redis) cukup menyediakan
+    method yang sama supaya generation counter bisa dibagi antar worker.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        ...
+
+    @abstractmethod
+    def set(self, key, value, ttl: float):
+        ...
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+    @abstractmethod
+    def incr(self, key) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Cache in-process dengan TTL per entry dan eviction LRU"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._counters = {}  # counter terpisah agar tidak ikut ter-evict LRU
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class ResponseCache:
+    """
+    Cache untuk endpoint read-heavy (dashboard, insights, profile).
+
+    Invalidasi memakai generation counter: setiap write di crud memanggil
+    invalidate() yang menaikkan generation, sehingga semua key lama otomatis
+    tidak terpakai lagi. Generation juga dipakai sebagai ETag.
+
+    Generation hanya berlaku di proses ini (mulai dari 0 lagi setelah restart,
+    tidak ikut naik karena write di worker / proses manage lain). Karena itu ETag
+    memuat boot_id per proses, dan 304 hanya boleh selama entry cache masih dalam
+    TTL (lihat is_cached) -> data basi paling lama CACHE_TTL_SECONDS.
+    """
+    GENERATION_KEY = "__generation__"
+
+    def __init__(self, backend: CacheBackend = None, ttl: float = CACHE_TTL_SECONDS):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.boot_id = uuid.uuid4().hex
+
+    @property
+    def generation(self) -> int:
+        return self.backend.get(self.GENERATION_KEY) or 0
+
+    def invalidate(self):
+        self.backend.incr(self.GENERATION_KEY)
+
+    def etag(self, key: str, generation: int = None) -> str:
+        generation = self.generation if generation is None else generation
+        digest = hashlib.sha1(f"{self.boot_id}:{key}:{generation}".encode()).hexdigest()[:16]
+        return f'W/"{digest}"'
+
+    def is_cached(self, key: str, generation: int = None) -> bool:
+        """True jika entry untuk generation ini masih ada (belum lewat TTL)"""
+        generation = self.generation if generation is None else generation
+        return self.backend.get(f"{key}:{generation}") is not None
+
+    def get_or_set(self, key: str, compute, generation: int = None):
+        generation = self.generation if generation is None else generation
+        full_key = f"{key}:{generation}"
+        value = self.backend.get(full_key)
+        if value is None:
+            value = compute()
+            self.backend.set(full_key, value, self.ttl)
+        return value
+
+
+response_cache = ResponseCache()
@@ -1,8 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import func, case, insert, update, select, bindparam, union_all, literal, text, or_, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from . import models, schemas
 from datetime import datetime, timezone
+from collections import Counter
+import base64
+import json
 from . import auth
+from .cache import response_cache
+from .ml_service import ml_service
 from typing import List
 
 # 1. Simpan Lead Baru ke Database
@@ -10,21 +17,138 @@ def create_lead(db: Session, lead_data: dict, prediction: dict):
     db_lead = models.Lead(
         **lead_data, 
         prediction_score=prediction.get("score"),
-        prediction_label=prediction.get("label")
+        prediction_label=prediction.get("label"),
+        model_version=prediction.get("model_version")
     )
     db.add(db_lead)
+    _apply_stat_deltas(db, _stat_deltas([{
+        **lead_data,
+        "prediction_score": prediction.get("score"),
+        "prediction_label": prediction.get("label"),
+    }]))
     db.commit()
+    response_cache.invalidate()
     db.refresh(db_lead)
     return db_lead
 
+# 1b. Simpan Banyak Lead Sekaligus (untuk upload CSV)
+def bulk_create_leads(db: Session, leads_data: List[dict], predictions: List[dict], chunk_size: int = 1000):
+    """
+    Insert lead hasil scoring per chunk dalam SATU transaksi.
+    Tiap chunk dikirim sebagai executemany (multi-row VALUES + RETURNING id),
+    jadi jumlah round trip = jumlah chunk, bukan jumlah baris.
+    Return: list id lead yang berhasil disimpan (urut sesuai input).
+    """
+    stmt = insert(models.Lead).returning(models.Lead.id, sort_by_parameter_order=True)
+    lead_ids = []
+    try:
+        for start in range(0, len(leads_data), chunk_size):
+            rows = [
+                {
+                    **lead_data,
+                    "prediction_score": prediction.get("score"),
+                    "prediction_label": prediction.get("label"),
+                    "model_version": prediction.get("model_version"),
+                }
+                for lead_data, prediction in zip(
+                    leads_data[start:start + chunk_size], predictions[start:start + chunk_size]
+                )
+            ]
+            lead_ids.extend(db.scalars(stmt, rows).all())
+            _apply_stat_deltas(db, _stat_deltas(rows))
+        db.commit()
+        response_cache.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+    return lead_ids
+
+def get_leads_by_ids(db: Session, lead_ids: List[int]):
+    return db.query(models.Lead).filter(models.Lead.id.in_(lead_ids)).order_by(models.Lead.id.asc()).all()
+
+# 1c. Background Ingest Job
+def create_ingest_job(db: Session, filename: str):
+    job = models.IngestJob(filename=filename, status="queued")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_ingest_job(db: Session, job_id: int):
+    return db.query(models.IngestJob).filter(models.IngestJob.id == job_id).first()
+
+# 1d. Re-scoring Lead Lama (setelah model diganti)
+def create_rescore_job(db: Session, model_version: str):
+    """Rentang id dibekukan sekarang: lead yang masuk setelah ini sudah di-score model aktif"""
+    max_id, total = db.query(func.max(models.Lead.id), func.count(models.Lead.id)).one()
+    job = models.RescoreJob(
+        model_version=model_version, status="queued",
+        last_lead_id=0, max_lead_id=max_id or 0, total_leads=total or 0
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_rescore_job(db: Session, job_id: int):
+    return db.query(models.RescoreJob).filter(models.RescoreJob.id == job_id).first()
+
+def get_unfinished_rescore_jobs(db: Session):
+    return (
+        db.query(models.RescoreJob)
+        .filter(models.RescoreJob.status.in_(["queued", "running"]))
+        .order_by(models.RescoreJob.id.asc()).all()
+    )
+
+# Kolom yang dibaca untuk re-scoring: fitur model + kolom dimensi counter dashboard
+RESCORE_COLUMNS = [c for c in models.Lead.__table__.columns if c.name not in ("notes", "created_at", "updated_at")]
+
+def get_leads_for_rescore(db: Session, after_id: int, max_id: int, limit: int):
+    """Satu batch keyset (id > after_id), bukan OFFSET: biaya tiap batch konstan"""
+    return db.execute(
+        select(*RESCORE_COLUMNS)
+        .where(models.Lead.id > after_id, models.Lead.id <= max_id)
+        .order_by(models.Lead.id.asc())
+        .limit(limit)
+    ).mappings().all()
+
+def bulk_update_scores(db: Session, leads: List[dict], predictions: List[dict]):
+    """
+    Tulis ulang skor banyak lead dengan SATU UPDATE executemany (bind parameter per baris).
+    leads = baris lama dari get_leads_for_rescore, untuk koreksi counter dashboard.
+    Perubahan lain yang pending di session (mis. checkpoint job) ikut di-commit.
+    """
+    table = models.Lead.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("lead_id"))
+        .values(
+            prediction_score=bindparam("new_score"),
+            prediction_label=bindparam("new_label"),
+            model_version=bindparam("new_version"),
+            updated_at=table.c.updated_at, # Re-scoring bukan aktivitas sales: updated_at tetap
+        )
+    )
+    try:
+        db.execute(stmt, [
+            {"lead_id": lead["id"], "new_score": p["score"], "new_label": p["label"], "new_version": p["model_version"]}
+            for lead, p in zip(leads, predictions)
+        ])
+        deltas = _negate(_stat_deltas(leads))
+        deltas.update(_stat_deltas([
+            {**lead, "prediction_score": p["score"], "prediction_label": p["label"]}
+            for lead, p in zip(leads, predictions)
+        ]))
+        _apply_stat_deltas(db, deltas)
+        db.commit()
+        response_cache.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
 # 2. Ambil List Leads (Dengan Logika Filtering, Pagination, & Total Count)
-def get_leads(db: Session, skip: int = 0, limit: int = 100, sort_by: str = "newest", 
-              job: str = None, min_age: int = None, max_age: int = None, 
-              min_score: float = None, status: str = None): # Tambah parameter status
-    
-    query = db.query(models.Lead)
-    
-    # --- LOGIKA FILTERING ---
+def _filter_leads(query, job: str = None, min_age: int = None, max_age: int = None,
+                  min_score: float = None, status: str = None):
     if job:
         query = query.filter(models.Lead.job == job)
     if min_age is not None:
@@ -35,34 +159,235 @@ def get_leads(db: Session, skip: int = 0, limit: int = 100, sort_by: str = "newe
         query = query.filter(models.Lead.prediction_score >= min_score)
     if status: # Tambah filter status di sini
         query = query.filter(models.Lead.status == status)
+    return query
 
-    # Hitung TOTAL hasil filter (sebelum skip & limit)
-    filtered_count = query.count()
-
-    # --- LOGIKA SORTING ---
+def _sort_leads(query, sort_by: str):
+    # id selalu jadi tie-breaker supaya urutan stabil (wajib untuk keyset pagination)
+    score = models.Lead.prediction_score
     if sort_by == "score_high":
-        query = query.order_by(models.Lead.prediction_score.desc())
+        return query.order_by(score.desc().nulls_last(), models.Lead.id.desc())
     elif sort_by == "score_low":
-        query = query.order_by(models.Lead.prediction_score.asc())
+        return query.order_by(score.asc().nulls_last(), models.Lead.id.asc())
     elif sort_by == "oldest":
-        query = query.order_by(models.Lead.id.asc())
+        return query.order_by(models.Lead.id.asc())
+    return query.order_by(models.Lead.id.desc())
+
+def encode_cursor(sort_by: str, lead) -> str:
+    """Cursor opaque = base64(json([sort key, id])) dari baris terakhir di halaman"""
+    key = lead.prediction_score if sort_by in ("score_high", "score_low") else None
+    raw = json.dumps([key, lead.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, lead_id = json.loads(raw)
+        return (None if key is None else float(key)), int(lead_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _after_cursor(query, sort_by: str, cursor: str):
+    """Keyset: ambil baris SETELAH (sort key, id) terakhir, tanpa OFFSET"""
+    key, last_id = decode_cursor(cursor)
+    score, lead_id = models.Lead.prediction_score, models.Lead.id
+
+    if sort_by == "oldest":
+        return query.filter(lead_id > last_id)
+    if sort_by not in ("score_high", "score_low"):
+        return query.filter(lead_id < last_id)
+
+    # NULL score selalu di akhir (nulls_last)
+    newer = lead_id < last_id if sort_by == "score_high" else lead_id > last_id
+    if key is None:
+        return query.filter(score.is_(None), newer)
+    beyond = score < key if sort_by == "score_high" else score > key
+    return query.filter(or_(beyond, and_(score == key, newer), score.is_(None)))
+
+def _approximate_lead_count(db: Session, job: str = None, min_age: int = None, max_age: int = None,
+                            min_score: float = None, status: str = None):
+    """
+    Total murah tanpa COUNT(*): dari counter dashboard (lead_stats) jika filter
+    cukup satu dimensi (tanpa filter / job / status), atau pg_class.reltuples di Postgres.
+    Return None jika tidak bisa diperkirakan dengan murah.
+    """
+    if min_age is not None or max_age is not None or min_score is not None or (job and status):
+        return None
+
+    stats = get_lead_stats(db)
+    if job:
+        return dict(stats["job_dist"]).get(job, 0)
+    if status:
+        return dict(stats["status"]).get(status, 0)
+    if stats["label"]:
+        return sum(n for _, n in stats["label"])
+
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'leads'")).scalar()
+        return max(int(estimate or 0), 0)
+    return 0
+
+# Kolom yang bisa dipilih lewat ?fields= di /api/v1/leads. "list" = kolom tabel leads di frontend.
+LEAD_LIST_COLUMNS = {c.name: c for c in models.Lead.__table__.columns}
+LEAD_FIELD_PRESETS = {
+    "list": ["id", "job", "age", "marital", "status", "prediction_label", "prediction_score"],
+}
+
+def parse_lead_fields(fields: str = None):
+    """'list' atau 'id,job,age' -> daftar nama kolom (id selalu ikut). None = semua kolom."""
+    if not fields:
+        return None
+    names = LEAD_FIELD_PRESETS.get(fields) or [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in LEAD_LIST_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown lead fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(names) if f != "id"]
+
+def get_leads(db: Session, skip: int = 0, limit: int = 100, sort_by: str = "newest", 
+              job: str = None, min_age: int = None, max_age: int = None, 
+              min_score: float = None, status: str = None, # Tambah parameter status
+              cursor: str = None, count: str = "exact", fields: List[str] = None):
+    """
+    count: "exact" (COUNT(*) hasil filter), "approximate" (lihat _approximate_lead_count) atau "none".
+    cursor: jika diisi, pakai keyset pagination (skip diabaikan) -> latency konstan di halaman dalam.
+    fields: kolom yang diambil (lihat parse_lead_fields), None = semua kolom.
+    Data berupa list dict (query kolom, tanpa membuat objek ORM per baris).
+    Return: (total, data, next_cursor)
+    """
+    filters = dict(job=job, min_age=min_age, max_age=max_age, min_score=min_score, status=status)
+    query = _filter_leads(db.query(models.Lead), **filters)
+
+    # Hitung TOTAL hasil filter (sebelum skip & limit)
+    if count == "exact":
+        filtered_count = query.count()
+    elif count == "approximate":
+        filtered_count = _approximate_lead_count(db, **filters)
     else:
-        query = query.order_by(models.Lead.id.desc())
+        filtered_count = None
+
+    # --- LOGIKA SORTING ---
+    names = fields or list(LEAD_LIST_COLUMNS)
+    # prediction_score selalu diambil untuk cursor, tapi hanya dikirim jika diminta
+    columns = [LEAD_LIST_COLUMNS[n] for n in names]
+    if "prediction_score" not in names:
+        columns.append(models.Lead.prediction_score)
+    query = _sort_leads(_filter_leads(db.query(*columns), **filters), sort_by)
         
-    # Ambil data dengan pagination
-    data = query.offset(skip).limit(limit).all()
+    # Ambil data dengan pagination (ambil 1 ekstra untuk tahu ada halaman berikutnya)
+    if cursor:
+        query = _after_cursor(query, sort_by, cursor)
+    else:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
 
-    return filtered_count, data 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_by, rows[-1])
+
+    data = [dict(zip(names, row)) for row in rows]
+    return filtered_count, data, next_cursor
+
+
+# 2c. Export Leads (streaming dari server-side cursor)
+EXPORT_COLUMNS = list(models.Lead.__table__.columns)
+
+def iter_leads_export(db: Session, job: str = None, min_age: int = None, max_age: int = None,
+                      min_score: float = None, status: str = None, sort_by: str = "newest",
+                      batch_size: int = 5000):
+    """
+    Filter & urutan sama dengan get_leads, tanpa COUNT/OFFSET. yield_per = server-side
+    cursor di Postgres: baris diambil per batch, jadi memori konstan berapa pun jumlah lead.
+    Yield list Row per batch.
+    """
+    query = _filter_leads(db.query(*EXPORT_COLUMNS), job, min_age, max_age, min_score, status)
+    statement = _sort_leads(query, sort_by).statement.execution_options(yield_per=batch_size)
+    for rows in db.execute(statement).partitions():
+        yield rows
 
 # 3. Ambil Detail Satu Lead
 def get_lead_by_id(db: Session, lead_id: int):
     return db.query(models.Lead).filter(models.Lead.id == lead_id).first()
 
+# 3b. Explanation SHAP per Lead (dihitung sekali, lalu dibaca dari DB)
+LEAD_COLUMNS = models.Lead.__table__.columns.keys()
+
+def _lead_features(lead) -> dict:
+    return {c: getattr(lead, c) for c in LEAD_COLUMNS}
+
+def store_lead_explanations(db: Session, lead_ids: List[int], top_features: List[list], model_version: str):
+    """
+    Simpan hasil explain_top_features (belum di-commit). Baris lama diganti lewat upsert,
+    jadi dua request yang membuka lead yang sama bersamaan tidak bentrok di primary key.
+    """
+    rows = [
+        {"lead_id": lead_id, "model_version": model_version, "top_features": json.dumps(pairs)}
+        for lead_id, pairs in zip(lead_ids, top_features)
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(models.LeadExplanation)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["lead_id"],
+            set_={"model_version": stmt.excluded.model_version, "top_features": stmt.excluded.top_features}
+        )
+        db.execute(stmt, rows)
+    else:
+        db.query(models.LeadExplanation).filter(models.LeadExplanation.lead_id.in_(lead_ids)).delete(synchronize_session=False)
+        db.execute(insert(models.LeadExplanation), rows)
+
+def explain_leads(db: Session, lead_ids: List[int], leads_data: List[dict]):
+    """Batch: satu kali shap_values() untuk semua lead, lalu simpan top-k"""
+    bundle = ml_service.active
+    if not bundle.explainer or not lead_ids:
+        return
+    try:
+        X = bundle.encoder.encode_records(leads_data)
+        store_lead_explanations(db, lead_ids, ml_service.explain_top_features(X, bundle=bundle), bundle.version)
+        db.commit()
+    except Exception as e:
+        # Tidak fatal: explanation tetap bisa dihitung lazy saat lead dibuka
+        db.rollback()
+        print(f"Explain Error: {e}")
+
+def get_lead_explanation(db: Session, lead):
+    """
+    Explanation dari cache DB. Dihitung (lalu disimpan) hanya jika belum ada
+    atau dibuat oleh versi model yang berbeda.
+    """
+    if not ml_service.is_loaded:
+        return None # Model masih di-load saat startup; lead tetap bisa ditampilkan
+
+    bundle = ml_service.active # Satu versi untuk seluruh proses (hot reload bisa terjadi kapan saja)
+    features = _lead_features(lead)
+    cached = db.get(models.LeadExplanation, lead.id)
+    if cached is not None and cached.model_version == bundle.version:
+        top_features = json.loads(cached.top_features)
+    else:
+        if not bundle.explainer:
+            return None
+        try:
+            X = bundle.encoder.encode_records([features])
+            top_features = ml_service.explain_top_features(X, bundle=bundle)[0]
+            store_lead_explanations(db, [lead.id], [top_features], bundle.version)
+            db.commit()
+        except Exception as e:
+            # Sama seperti explain_prediction dulu: detail lead tetap tampil tanpa explanation
+            db.rollback()
+            print(f"Explain Error: {e}")
+            return None
+
+    row = bundle.encoder.encode_records([features])[0]
+    return ml_service.format_explanation(top_features, row, bundle)
+
 # 4. Bulk Actions (Penyebutan in_ langsung pada kolom)
 def bulk_delete_leads(db: Session, lead_ids: List[int]):
     try:
+        removed = _stat_counts(db, models.Lead.id.in_(lead_ids))
+        db.query(models.LeadExplanation).filter(models.LeadExplanation.lead_id.in_(lead_ids)).delete(synchronize_session=False)
         db.query(models.Lead).filter(models.Lead.id.in_(lead_ids)).delete(synchronize_session=False)
+        _apply_stat_deltas(db, _negate(removed))
         db.commit()
+        response_cache.invalidate()
         return True
     except Exception as e:
         db.rollback()
@@ -70,18 +395,224 @@ def bulk_delete_leads(db: Session, lead_ids: List[int]):
 
 def bulk_update_status(db: Session, lead_ids: List[int], new_status: str):
     try:
+        old_status = Counter(dict(
+            db.query(models.Lead.status, func.count(models.Lead.id))
+            .filter(models.Lead.id.in_(lead_ids)).group_by(models.Lead.status).all()
+        ))
         db.query(models.Lead).filter(models.Lead.id.in_(lead_ids)).update(
             {"status": new_status, "updated_at": func.now()}, 
             synchronize_session=False
         )
+        deltas = Counter({("status", status): -n for status, n in old_status.items()})
+        deltas[("status", new_status)] += sum(old_status.values())
+        _apply_stat_deltas(db, deltas)
         db.commit()
+        response_cache.invalidate()
         return True
     except Exception as e:
         db.rollback()
         return False
 
+def update_lead_progress(db: Session, lead_id: int, data: dict):
+    db_lead = get_lead_by_id(db, lead_id=lead_id)
+    if not db_lead:
+        return None
+
+    # Update catatan jika ada
+    if "notes" in data:
+        db_lead.notes = data.get("notes")
+
+    # Update status jika ada
+    if "status" in data:
+        new_status = data.get("status")
+        if new_status != db_lead.status:
+            _apply_stat_deltas(db, Counter({("status", db_lead.status): -1, ("status", new_status): 1}))
+        db_lead.status = new_status
+
+    db.commit()
+    response_cache.invalidate()
+    return db_lead
+
+# 5. Counter Dashboard (materialized, di-update incremental oleh setiap write)
+AGE_BUCKETS = [(25, '18-25'), (35, '26-35'), (45, '36-45'), (55, '46-55'), (65, '56-65')]
+SCORE_BUCKETS = [(0.2, '0-20'), (0.4, '21-40'), (0.6, '41-60'), (0.8, '61-80')]
+ECON_BUCKETS = [(1.5, 'Low Interest'), (4.0, 'Medium Interest')]
+
+# Bucket untuk nilai NULL (kolom primary key lead_stats tidak boleh NULL)
+NULL_BUCKET = ""
+
+def _bucket_case(column, buckets, else_):
+    return case(*[(column <= upper, name) for upper, name in buckets], else_=else_)
+
+def _bucket_of(value, buckets, else_):
+    # Sama persis dengan CASE di SQL: NULL tidak memenuhi "<=", jadi jatuh ke else_
+    if value is not None:
+        for upper, name in buckets:
+            if value <= upper:
+                return name
+    return else_
+
+# Bucket yang ditampilkan di dashboard (satu dimensi = satu chart) + status lead
+def _stat_dimensions():
+    return {
+        "age_dist": _bucket_case(models.Lead.age, AGE_BUCKETS, '65+'),
+        "score_dist": _bucket_case(models.Lead.prediction_score, SCORE_BUCKETS, '81-100'),
+        "marital_dist": models.Lead.marital,
+        "edu_dist": models.Lead.education,
+        "job_dist": models.Lead.job,
+        "econ_dist": _bucket_case(models.Lead.euribor3m, ECON_BUCKETS, 'High Interest'),
+        "label": models.Lead.prediction_label,
+        "status": models.Lead.status,
+    }
+
+def _stat_deltas(rows: List[dict]) -> Counter:
+    """Versi Python dari _stat_dimensions() untuk baris yang baru di-insert"""
+    deltas = Counter()
+    for row in rows:
+        deltas[("age_dist", _bucket_of(row.get("age"), AGE_BUCKETS, '65+'))] += 1
+        deltas[("score_dist", _bucket_of(row.get("prediction_score"), SCORE_BUCKETS, '81-100'))] += 1
+        deltas[("marital_dist", row.get("marital"))] += 1
+        deltas[("edu_dist", row.get("education"))] += 1
+        deltas[("job_dist", row.get("job"))] += 1
+        deltas[("econ_dist", _bucket_of(row.get("euribor3m"), ECON_BUCKETS, 'High Interest'))] += 1
+        deltas[("label", row.get("prediction_label"))] += 1
+        deltas[("status", row.get("status", "New"))] += 1
+    return deltas
+
+def _negate(counts: Counter) -> Counter:
+    return Counter({key: -n for key, n in counts.items()})
+
+def _apply_stat_deltas(db: Session, deltas: Counter):
+    """Upsert "lead_count = lead_count + delta" untuk setiap bucket (belum di-commit)"""
+    rows = [
+        {"dimension": dim, "bucket": NULL_BUCKET if bucket is None else str(bucket), "lead_count": n}
+        for (dim, bucket), n in deltas.items() if n
+    ]
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(models.LeadStat)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["dimension", "bucket"],
+            set_={"lead_count": models.LeadStat.lead_count + stmt.excluded.lead_count}
+        )
+        db.execute(stmt, rows)
+    else:
+        for row in rows:
+            stat = db.get(models.LeadStat, (row["dimension"], row["bucket"]))
+            if stat:
+                stat.lead_count += row["lead_count"]
+            else:
+                db.add(models.LeadStat(**row))
+
+def _stat_counts_statement(db: Session, *filters):
+    """
+    Query agregat semua dimensi dalam SATU round trip.
+    - PostgreSQL: satu scan tabel dengan GROUPING SETS
+    - Dialect lain (SQLite): UNION ALL dari GROUP BY per dimensi
+    """
+    dims = _stat_dimensions()
+    sub = select(*[expr.label(name) for name, expr in dims.items()]).where(*filters).subquery()
+
+    if db.get_bind().dialect.name == "postgresql":
+        return select(
+            *[sub.c[name] for name in dims],
+            *[func.grouping(sub.c[name]).label(f"g_{name}") for name in dims],
+            func.count().label("n")
+        ).group_by(func.grouping_sets(*[sub.c[name] for name in dims]))
+
+    return union_all(*[
+        select(
+            literal(name).label("dim"), sub.c[name].label("bucket"), func.count().label("n")
+        ).group_by(sub.c[name])
+        for name in dims
+    ])
+
+def _stat_counts(db: Session, *filters) -> Counter:
+    """
+    Hitung semua dimensi langsung dari tabel leads.
+    Return: Counter {(dimensi, bucket): jumlah}
+    """
+    stmt = _stat_counts_statement(db, *filters)
+    counts = Counter()
+
+    if db.get_bind().dialect.name == "postgresql":
+        dims = list(_stat_dimensions())
+        for row in db.execute(stmt).mappings():
+            for name in dims:
+                if row[f"g_{name}"] == 0:
+                    counts[(name, row[name])] += row["n"]
+                    break
+    else:
+        for dim, bucket, n in db.execute(stmt):
+            counts[(dim, bucket)] += n
+
+    return counts
+
+# Baris penanda di lead_stats: counter sudah dibangun dari tabel leads (bukan ditebak dari tabel kosong)
+STATS_MARKER = {"dimension": "_meta", "bucket": "initialized", "lead_count": 1}
+# Kunci pg_advisory_xact_lock untuk rebuild counter (angka bebas, unik di aplikasi ini)
+STATS_LOCK_ID = 7_202_501
+
+def _lock_lead_stats(db: Session):
+    """Serialisasi rebuild antar proses/worker di Postgres (lepas otomatis saat commit/rollback)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": STATS_LOCK_ID})
+
+def _stats_initialized(db: Session) -> bool:
+    return db.get(models.LeadStat, (STATS_MARKER["dimension"], STATS_MARKER["bucket"])) is not None
+
+def rebuild_lead_stats(db: Session):
+    """Rekonsiliasi: hitung ulang seluruh counter dari tabel leads mentah"""
+    _lock_lead_stats(db)
+    counts = _stat_counts(db)
+    db.query(models.LeadStat).delete()
+    _apply_stat_deltas(db, counts)
+    db.execute(insert(models.LeadStat), [STATS_MARKER])
+    db.commit()
+    response_cache.invalidate()
+    return len(counts)
+
+def initialize_lead_stats(db: Session) -> bool:
+    """
+    Dipanggil sekali saat startup / migrate: bangun counter jika penanda belum ada
+    (mis. baru deploy ke tabel leads yang sudah berisi). Write sebelum ini aman karena
+    rebuild menghitung ulang dari nol. Return True jika rebuild dijalankan.
+    """
+    if _stats_initialized(db):
+        return False
+    _lock_lead_stats(db)
+    # Cek ulang setelah dapat lock: worker lain mungkin baru selesai rebuild
+    db.expire_all()
+    if _stats_initialized(db):
+        db.rollback()
+        return False
+    rebuild_lead_stats(db)
+    return True
+
+def get_lead_stats(db: Session):
+    """
+    Baca counter dashboard: O(jumlah bucket), tanpa scan tabel leads.
+    Counter dibangun saat startup (initialize_lead_stats), tidak di jalur baca ini.
+    Return: {dimensi: [(bucket, jumlah), ...]}
+    """
+    stats = db.query(models.LeadStat).filter(
+        models.LeadStat.lead_count > 0, models.LeadStat.dimension != STATS_MARKER["dimension"]
+    ).order_by(models.LeadStat.dimension, models.LeadStat.bucket).all()
+
+    result = {name: [] for name in _stat_dimensions()}
+    for stat in stats:
+        bucket = None if stat.bucket == NULL_BUCKET else stat.bucket
+        result.setdefault(stat.dimension, []).append((bucket, stat.lead_count))
+    return result
+
 def get_dashboard_stats(db: Session):
-    total = db.query(models.Lead).count()
+    counts = get_lead_stats(db)
+    counts.pop("status", None)
+    labels = dict(counts.pop("label"))
+    total = sum(labels.values())
     
     # Handle DB Kosong agar tidak Error 500 di Frontend
     if total == 0:
@@ -91,57 +622,17 @@ def get_dashboard_stats(db: Session):
             "marital_dist": [], "edu_dist": [], "job_dist": [], "econ_dist": []
         }
 
-    # Age Grouping
-    age_groups = db.query(
-        case(
-            (models.Lead.age <= 25, '18-25'),
-            (models.Lead.age <= 35, '26-35'),
-            (models.Lead.age <= 45, '36-45'),
-            (models.Lead.age <= 55, '46-55'),
-            (models.Lead.age <= 65, '56-65'),
-            else_='65+'
-        ).label('age_range'),
-        func.count(models.Lead.id)
-    ).group_by('age_range').all()
-
-    # Score Distribution
-    score_dist = db.query(
-        case(
-            (models.Lead.prediction_score <= 0.2, '0-20'),
-            (models.Lead.prediction_score <= 0.4, '21-40'),
-            (models.Lead.prediction_score <= 0.6, '41-60'),
-            (models.Lead.prediction_score <= 0.8, '61-80'),
-            else_='81-100'
-        ).label('score_range'),
-        func.count(models.Lead.id)
-    ).group_by('score_range').all()
-
-    marital_data = db.query(models.Lead.marital, func.count(models.Lead.id)).group_by(models.Lead.marital).all()
-    edu_data = db.query(models.Lead.education, func.count(models.Lead.id)).group_by(models.Lead.education).all()
-    
-    economy_data = db.query(
-        case(
-            (models.Lead.euribor3m <= 1.5, 'Low Interest'),
-            (models.Lead.euribor3m <= 4.0, 'Medium Interest'),
-            else_='High Interest'
-        ).label('econ_type'),
-        func.count(models.Lead.id)
-    ).group_by('econ_type').all()
-
-    job_data = db.query(models.Lead.job, func.count(models.Lead.id)).group_by(models.Lead.job).all()
-
+    high = labels.get("High Potential", 0)
     return {
         "total_leads": total,
-        "high_potential": db.query(models.Lead).filter(models.Lead.prediction_label == "High Potential").count(),
-        "medium_potential": db.query(models.Lead).filter(models.Lead.prediction_label == "Medium Potential").count(),
-        "low_potential": db.query(models.Lead).filter(models.Lead.prediction_label == "Low Potential").count(),
-        "conversion_rate_estimate": round((db.query(models.Lead).filter(models.Lead.prediction_label == "High Potential").count() / total * 100), 2) if total > 0 else 0,
-        "age_dist": [{"name": i[0], "value": i[1]} for i in age_groups],
-        "score_dist": [{"name": i[0], "value": i[1]} for i in score_dist],
-        "marital_dist": [{"name": i[0], "value": i[1]} for i in marital_data],
-        "edu_dist": [{"name": i[0], "value": i[1]} for i in edu_data],
-        "job_dist": [{"name": i[0], "value": i[1]} for i in job_data],
-        "econ_dist": [{"name": i[0], "value": i[1]} for i in economy_data]
+        "high_potential": high,
+        "medium_potential": labels.get("Medium Potential", 0),
+        "low_potential": labels.get("Low Potential", 0),
+        "conversion_rate_estimate": round((high / total * 100), 2),
+        **{
+            name: [{"name": bucket, "value": n} for bucket, n in rows]
+            for name, rows in counts.items()
+        }
     }
     
 def get_user_profile(db: Session, user_id: int):
@@ -160,8 +651,9 @@ def get_user_profile(db: Session, user_id: int):
         db.commit()
         db.refresh(profile)
     
-    total_leads = db.query(models.Lead).count()
-    high_leads = db.query(models.Lead).filter(models.Lead.prediction_label == "High Potential").count()
+    labels = dict(get_lead_stats(db)["label"])
+    total_leads = sum(labels.values())
+    high_leads = labels.get("High Potential", 0)
     
     # REVISI: Hitung Active Days dengan menyamakan zona waktu ke UTC
     first_lead = db.query(models.Lead).order_by(models.Lead.created_at.asc()).first()
@@ -210,14 +702,31 @@ def update_user_profile(db: Session, user_id: int, data: dict):
             if key in allowed_fields:
                 setattr(profile, key, value)
         db.commit()
+        response_cache.invalidate()
         db.refresh(profile)
     return profile
 
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
-def create_user(db: Session, user_data: dict):
-    hashed_pwd = auth.get_password_hash(user_data['password'])
+def set_user_active(db: Session, username: str, is_active: bool):
+    user = get_user_by_username(db, username=username)
+    if not user:
+        return None
+    user.is_active = is_active
+    db.commit()
+    # Principal yang di-cache get_current_user harus ikut berubah (user nonaktif langsung ditolak)
+    auth.invalidate_principal(username)
+    db.refresh(user)
+    return user
+
+def update_password_hash(db: Session, user, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+
+def create_user(db: Session, user_data: dict, hashed_pwd: str = None):
+    # hashed_pwd bisa dihitung pemanggil di luar thread request (auth.get_password_hash_async)
+    hashed_pwd = hashed_pwd or auth.get_password_hash(user_data['password'])
     db_user = models.User(username=user_data['username'], hashed_password=hashed_pwd)
     db.add(db_user)
     db.commit()
@@ -236,35 +745,26 @@ def create_user(db: Session, user_data: dict):
 
 def delete_all_leads(db: Session):
     try:
+        db.query(models.LeadExplanation).delete()
         db.query(models.Lead).delete()
+        # Penanda tetap ada: counter kosong memang benar untuk tabel leads kosong
+        db.query(models.LeadStat).filter(models.LeadStat.dimension != STATS_MARKER["dimension"]).delete()
         db.commit()
+        response_cache.invalidate()
         return True
     except Exception:
         db.rollback()
         return False
     
 def get_ai_model_insights():
-    # Metrik ini diambil dari hasil evaluasi Model V2 kamu
+    # Metrik dibaca dari metadata versi model yang aktif (registry)
     # Ini menunjukkan transparansi performa kepada Admin
+    metadata = ml_service.metadata
     return {
-        "model_name": "XGBoost Classifier v2.0",
-        "last_trained": "2026-01-03",
-        "metrics": {
-            "accuracy": 0.8537,
-            "precision": 0.4064,
-            "recall": 0.6476,
-            "f1_score": 0.4994
-        },
-        "feature_importance": [
-            {"name": "nr.employed", "impact": 0.52, "type": "Economic"},
-            {"name": "euribor3m", "impact": 0.14, "type": "Economic"},
-            {"name": "contact_telephone", "impact": 0.12, "type": "Campaign"},
-            {"name": "cons.conf.idx", "impact": 0.11, "type": "Economic"},
-            {"name": "pernah_dihubungi", "impact": 0.08, "type": "History"},
-            {"name": "age", "impact": 0.04, "type": "Demographic"}
-        ],
-        "thresholds": {
-            "high": 0.70,
-            "medium": 0.31
-        }
-    }   
\ No newline at end of file
+        "model_name": metadata.get("model_name", ml_service.model_version),
+        "model_version": ml_service.model_version,
+        "last_trained": metadata.get("last_trained"),
+        "metrics": metadata.get("metrics", {}),
+        "feature_importance": metadata.get("feature_importance", []),
+        "thresholds": ml_service.active.thresholds
+    }
@@ -1,9 +1,14 @@
 import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from dotenv import load_dotenv
 
+from .metrics import Histogram, LATENCY_BUCKETS
+
 # 1. Load file .env
 load_dotenv()
 
@@ -16,25 +21,106 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./crm.db")
 if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
     SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# 4. Konfigurasi Engine
+# 4. Tuning connection pool (semua bisa diatur lewat env)
+# DB_POOL_SIZE=0 -> NullPool: koneksi dibuka-tutup per request, pooling diserahkan ke
+# PgBouncer/Supavisor (cocok untuk banyak replica kecil)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Daur ulang koneksi sebelum di-drop oleh pooler/load balancer saat idle
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Cek koneksi (SELECT 1 ringan) saat checkout: koneksi basi setelah idle langsung diganti
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# PgBouncer / Supavisor mode transaction: tanpa prepared statement & tanpa setting level sesi.
+# Default aktif untuk port 6543 (transaction pooler Supabase).
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", str(":6543/" in SQLALCHEMY_DATABASE_URL)).lower() in ("1", "true", "yes")
+# Batas waktu per query (ms), 0 = tanpa batas
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool yang mencatat lama menunggu koneksi (checkout) dan jumlah timeout"""
+
+    checkout_wait = Histogram(LATENCY_BUCKETS)
+    timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            InstrumentedQueuePool.timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    stats = {
+        "pool_class": type(pool).__name__,
+        "pgbouncer_mode": DB_PGBOUNCER,
+        "pre_ping": DB_POOL_PRE_PING,
+        "recycle_seconds": DB_POOL_RECYCLE,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "timeouts": InstrumentedQueuePool.timeouts,
+            "checkout_wait_seconds": InstrumentedQueuePool.checkout_wait.snapshot(),
+        })
+    return stats
+
+
+# 5. Konfigurasi Engine
 if "sqlite" in SQLALCHEMY_DATABASE_URL:
     # Config khusus SQLite (wajib check_same_thread=False untuk FastAPI)
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False},
+        poolclass=InstrumentedQueuePool, pool_size=max(DB_POOL_SIZE, 1), max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT
     )
 else:
     # Config khusus PostgreSQL (Supabase / Neon)
     # Kita tidak perlu check_same_thread untuk Postgres
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    connect_args = {}
+    if DB_PGBOUNCER and "+psycopg:" in SQLALCHEMY_DATABASE_URL:
+        connect_args["prepare_threshold"] = None # psycopg 3: matikan prepared statement otomatis
+    if DB_STATEMENT_TIMEOUT_MS and not DB_PGBOUNCER:
+        # Parameter sesi saat connect; PgBouncer mode transaction tidak meneruskannya
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    pool_kwargs = {"poolclass": NullPool} if DB_POOL_SIZE == 0 else {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL, connect_args=connect_args,
+        pool_pre_ping=DB_POOL_PRE_PING, **pool_kwargs
+    )
+
+    if DB_STATEMENT_TIMEOUT_MS and DB_PGBOUNCER:
+        # SET LOCAL hanya berlaku di transaksi ini -> tidak bocor ke client lain di koneksi server yang sama
+        @event.listens_for(engine, "begin")
+        def _set_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-# 5. Dependency untuk mendapatkan session database
+# 6. Dependency untuk mendapatkan session database
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,213 @@
+"""
+Executor untuk kerja blocking dari endpoint async.
+
+- Encoding + scoring (CPU-bound: pandas/NumPy + XGBoost) -> process pool, satu
+  worker per core yang tersedia secara default (tanpa pool jika hanya satu core).
+  Tiap proses memuat booster + encoder sendiri, sehingga tidak berebut GIL dengan
+  event loop. File besar dibagi per batch ke semua worker (lihat score_batches).
+- Parsing file & query SQLAlchemy sinkron (I/O-bound) -> thread pool terbatas.
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+def available_cpus() -> int:
+    """
+    Core yang benar-benar boleh dipakai proses ini: affinity (taskset/cpuset) dan
+    kuota CFS cgroup v2 (mis. docker --cpus), bukan jumlah core host (os.cpu_count).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError: # Bukan Linux
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# Batas atas default: tiap worker memuat booster + encoder sendiri (puluhan-ratusan MB RSS)
+SCORING_PROCESSES_CAP = int(os.getenv("SCORING_PROCESSES_CAP", 4))
+# Default satu worker per core yang tersedia (maks SCORING_PROCESSES_CAP). Dengan satu core,
+# process pool hanya menambah overhead IPC -> 0 = scoring di proses ini (thread pool).
+_default_processes = min(available_cpus(), SCORING_PROCESSES_CAP)
+SCORING_PROCESSES = int(os.getenv("SCORING_PROCESSES", _default_processes if _default_processes > 1 else 0))
+IO_THREADS = int(os.getenv("IO_THREADS", 8))
+
+_io_pool = None
+_scoring_pool = None
+_pool_lock = threading.Lock()
+_worker_bundle = None # Hanya di proses worker: booster + encoder versi aktif
+
+
+def _load_worker_bundle(version: str, nthread: int):
+    """Worker cukup booster + encoder (tanpa explainer / startup tracking MLService)"""
+    from .ml_service import ModelBundle
+
+    bundle = ModelBundle(version, nthread=nthread)
+    bundle.load_model()
+    bundle.load_features()
+    return bundle
+
+
+def _init_scoring_worker(nthread: int):
+    # Dijalankan sekali per proses worker: load model + encoder milik proses ini
+    from .ml_service import LEGACY_VERSION, resolve_version
+
+    global _worker_bundle
+    try:
+        version = resolve_version()
+    except ValueError:
+        version = LEGACY_VERSION
+    # Bagi core antar proses supaya thread XGBoost tidak saling berebut
+    _worker_bundle = _load_worker_bundle(version, nthread)
+
+
+def _score_columns(columns: dict, model_version: str):
+    """
+    Dijalankan di proses worker: encode kolom mentah dengan encoder milik worker
+    lalu predict. Input berupa dict nama kolom -> array NumPy (bukan DataFrame /
+    list of dict), output array skor. Jika proses induk sudah hot reload ke versi
+    lain, worker ikut pindah versi dulu.
+    """
+    global _worker_bundle
+    if _worker_bundle.version != model_version:
+        _worker_bundle = _load_worker_bundle(model_version, _worker_bundle.nthread)
+    bundle = _worker_bundle
+    if not bundle.model or not bundle.encoder:
+        return None
+    X = bundle.encoder.encode_frame(pd.DataFrame(columns, copy=False))
+    return bundle.model.inplace_predict(X, iteration_range=bundle.iteration_range).astype(float)
+
+
+def frame_columns(df: pd.DataFrame, encoder) -> dict:
+    """Kolom mentah yang dibutuhkan encoder, sebagai array NumPy (murah di-pickle ke worker)"""
+    return {col: df[col].to_numpy() for col in df.columns if col in encoder.input_columns}
+
+
+def io_pool():
+    # Dibuat lazy (seperti scoring_pool) supaya lifespan berikutnya di proses yang sama
+    # (mis. TestClient kedua) mendapat pool baru setelah shutdown()
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="io")
+        return _io_pool
+
+
+def scoring_pool():
+    global _scoring_pool
+    if _scoring_pool is not None or SCORING_PROCESSES <= 0:
+        return _scoring_pool
+    # Double-checked locking: thread prewarm & thread upload/ingest bisa memanggil bersamaan,
+    # tanpa lock keduanya membuat pool dan satu pool (beserta prosesnya) bocor
+    with _pool_lock:
+        if _scoring_pool is None:
+            # spawn, bukan fork: proses induk sudah punya banyak thread (uvicorn, pool DB)
+            _scoring_pool = ProcessPoolExecutor(
+                max_workers=SCORING_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_scoring_worker,
+                initargs=(max(1, available_cpus() // SCORING_PROCESSES),),
+            )
+        return _scoring_pool
+
+
+def predictions_from_scores(scores, n: int, bundle):
+    from .ml_service import MLService
+
+    if scores is None:
+        return [{"score": None, "label": None, "model_version": None}] * n
+    return [
+        {"score": float(p), "label": MLService.label_for(p, bundle.thresholds), "model_version": bundle.version}
+        for p in np.asarray(scores)
+    ]
+
+
+def score_batches(batches: Iterator[pd.DataFrame], max_in_flight: int = None):
+    """
+    Scoring paralel antar proses dengan urutan output tetap.
+    Kolom mentah tiap batch dikirim ke worker; encoding + predict berjalan di worker.
+    Maksimal max_in_flight batch menunggu hasil, jadi memori tetap terbatas.
+
+    Yield (df, predictions) sesuai urutan input; predictions berupa Exception
+    jika scoring batch itu gagal (pemanggil yang memutuskan gagal total atau lanjut).
+    """
+    from .ml_service import ml_service
+
+    ml_service.load() # No-op jika sudah, menunggu jika load startup masih berjalan
+    # Satu file = satu versi model, walau ada hot reload di tengah upload
+    bundle = ml_service.active
+    pool = scoring_pool()
+    if pool is None:
+        for df in batches:
+            try:
+                scores = ml_service.predict_proba(bundle.encoder.encode_frame(df), bundle) if bundle.model else None
+                yield df, predictions_from_scores(scores, len(df), bundle)
+            except Exception as e:
+                yield df, e
+        return
+
+    max_in_flight = max_in_flight or SCORING_PROCESSES * 2
+    pending = deque()
+
+    def pop():
+        df, future = pending.popleft()
+        try:
+            return df, predictions_from_scores(future.result(), len(df), bundle)
+        except Exception as e:
+            return df, e
+
+    for df in batches:
+        try:
+            # Encoding ikut di worker: proses ini hanya parsing & insert
+            pending.append((df, pool.submit(_score_columns, frame_columns(df, bundle.encoder), bundle.version)))
+        except Exception as e:
+            failed = Future()
+            failed.set_exception(e)
+            pending.append((df, failed))
+        if len(pending) >= max_in_flight:
+            yield pop()
+    while pending:
+        yield pop()
+
+
+def _ping():
+    return os.getpid()
+
+
+def prewarm():
+    """Spawn semua worker scoring sekarang (bukan saat upload pertama)"""
+    pool = scoring_pool()
+    if pool is not None:
+        for future in [pool.submit(_ping) for _ in range(SCORING_PROCESSES)]:
+            future.result()
+
+
+async def run_io(fn, *args, **kwargs):
+    """Jalankan fungsi blocking (parsing, SQLAlchemy) di thread pool I/O"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_pool(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown():
+    global _scoring_pool, _io_pool
+    with _pool_lock:
+        if _scoring_pool is not None:
+            _scoring_pool.shutdown(wait=False, cancel_futures=True)
+            _scoring_pool = None
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=False)
+            _io_pool = None
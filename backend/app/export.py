@@ -0,0 +1,91 @@
+"""
+Serializer streaming untuk export leads: CSV, NDJSON dan Parquet.
+
+Setiap format menerima iterator batch baris (crud.iter_leads_export) dan
+menghasilkan potongan bytes per batch, jadi StreamingResponse tidak pernah
+menyimpan seluruh hasil di memori. Parquet butuh pyarrow (opsional).
+"""
+import csv
+import io
+import os
+
+from sqlalchemy import Boolean, DateTime, Float, Integer
+
+from .crud import EXPORT_COLUMNS
+from .serialization import dumps
+
+# Baris per batch dari server-side cursor (= satu chunk response / satu row group Parquet)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+
+COLUMN_NAMES = [c.name for c in EXPORT_COLUMNS]
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def iter_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMN_NAMES)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(batches):
+    for rows in batches:
+        yield b"".join(dumps(dict(zip(COLUMN_NAMES, row))) + b"\n" for row in rows)
+
+
+def _arrow_schema(pa):
+    def arrow_type(column):
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, Float):
+            return pa.float64()
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us", tz="UTC" if column.type.timezone else None)
+        return pa.string()
+
+    return pa.schema([(c.name, arrow_type(c)) for c in EXPORT_COLUMNS])
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def iter_parquet(batches):
+    """Satu row group per batch; bytes yang sudah ditulis langsung dikirim"""
+    import pyarrow as pa # Opsional: hanya di-import jika format parquet diminta
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in batches:
+            columns = list(zip(*rows)) if rows else [[] for _ in COLUMN_NAMES]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    finally:
+        writer.close()
+    yield sink.getvalue() # Footer Parquet
+
+
+WRITERS = {"csv": iter_csv, "ndjson": iter_ndjson, "parquet": iter_parquet}
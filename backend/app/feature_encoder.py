@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Kolom kategorikal yang di-one-hot saat training (drop_first=True)
+CATEGORICAL_FIELDS = [
+    "job", "marital", "education", "default", "housing", "loan",
+    "contact", "month", "day_of_week", "poutcome"
+]
+
+# Nilai pdays yang berarti "belum pernah dihubungi" pada dataset UCI
+PDAYS_NEVER_CONTACTED = 999
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class FeatureEncoder:
+    """
+    Encoder fitur yang dikompilasi sekali dari model_features.json.
+
+    Semua pemetaan dihitung saat build:
+    - kolom numerik -> index kolom (nama bertitik 'emp.var.rate' dan versi DB 'emp_var_rate')
+    - (field, kategori) -> index kolom dummy, mis. ('job', 'blue-collar') -> 9
+    Sehingga encoding hanya berupa pengisian matriks NumPy yang sudah dialokasikan.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.numeric_index = {}
+        self.category_index = {field: {} for field in CATEGORICAL_FIELDS}
+
+        for i, name in enumerate(self.feature_names):
+            field = next((f for f in CATEGORICAL_FIELDS if name.startswith(f + "_")), None)
+            if field:
+                self.category_index[field][name[len(field) + 1:]] = i
+            else:
+                self.numeric_index[name] = i
+                self.numeric_index.setdefault(name.replace(".", "_"), i)
+
+        # Fitur turunan dari pdays (hasil feature engineering)
+        self.contacted_index = self.numeric_index.get("pernah_dihubungi")
+
+        # Kolom input yang dibaca encode_frame (kolom lain di file tidak perlu dikirim ke worker)
+        self.input_columns = frozenset(self.numeric_index) | frozenset(
+            field for field, categories in self.category_index.items() if categories
+        ) | ({"pdays"} if self.contacted_index is not None else frozenset())
+
+    def encode_records(self, records) -> np.ndarray:
+        """Encode list of dict (mis. satu lead dari simulator / ORM) ke matriks fitur"""
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for r, data in enumerate(records):
+            row = X[r]
+            for key, value in data.items():
+                idx = self.numeric_index.get(key)
+                if idx is not None:
+                    row[idx] = _to_float(value)
+                    continue
+
+                categories = self.category_index.get(key)
+                if categories is not None:
+                    idx = categories.get(value)
+                    if idx is not None:
+                        row[idx] = 1.0
+                    continue
+
+                if key == "pdays" and self.contacted_index is not None:
+                    pdays = _to_float(value)
+                    row[self.contacted_index] = 0.0 if np.isnan(pdays) or pdays == PDAYS_NEVER_CONTACTED else 1.0
+        return X
+
+    def encode_frame(self, df: pd.DataFrame) -> np.ndarray:
+        """Encode DataFrame secara vektor per kolom (tanpa get_dummies)"""
+        n = len(df)
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        rows = np.arange(n)
+
+        for col in df.columns:
+            idx = self.numeric_index.get(col)
+            if idx is not None:
+                X[:, idx] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                continue
+
+            categories = self.category_index.get(col)
+            if categories is not None:
+                codes = df[col].map(categories).to_numpy(dtype=np.float64, na_value=np.nan)
+                hit = ~np.isnan(codes)
+                X[rows[hit], codes[hit].astype(np.intp)] = 1.0
+                continue
+
+            if col == "pdays" and self.contacted_index is not None:
+                pdays = pd.to_numeric(df[col], errors="coerce").fillna(PDAYS_NEVER_CONTACTED)
+                X[:, self.contacted_index] = (pdays != PDAYS_NEVER_CONTACTED).to_numpy(dtype=np.float64)
+        return X
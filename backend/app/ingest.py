@@ -0,0 +1,247 @@
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from . import models, crud, executors
+from .database import SessionLocal
+
+# Jumlah baris per batch (parse -> scoring -> insert). Memori puncak ~ sebanding batch ini.
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 5000))
+
+# Jumlah worker background ingest job yang berjalan paralel
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+INGEST_TMP_DIR = os.getenv("INGEST_TMP_DIR", tempfile.gettempdir())
+
+# Hitung SHAP sekaligus saat ingest (satu shap_values per batch) agar detail lead
+# langsung tersedia. Default mati: explanation dihitung lazy saat lead pertama dibuka.
+EXPLAIN_ON_INGEST = os.getenv("EXPLAIN_ON_INGEST", "false").lower() in ("1", "true", "yes")
+
+LEAD_COLUMNS = set(models.Lead.__table__.columns.keys())
+
+
+def sniff_delimiter(header_line: str) -> str:
+    """Dataset bank UCI memakai ';', export lain biasanya ','"""
+    return ';' if header_line.count(';') > header_line.count(',') else ','
+
+
+def iter_csv_batches(fileobj: BinaryIO, batch_size: int = INGEST_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Baca CSV secara streaming dari file object biner (mis. UploadFile.file).
+    Delimiter ditebak sekali dari baris header, lalu pandas membaca per chunk.
+    """
+    header = fileobj.readline().decode('utf-8-sig', errors='replace')
+    fileobj.seek(0)
+    sep = sniff_delimiter(header)
+
+    reader = pd.read_csv(fileobj, sep=sep, chunksize=batch_size, encoding='utf-8-sig')
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+# Format upload yang didukung. Parquet & Arrow IPC dibaca dengan kolom bertipe (tanpa parsing teks), butuh pyarrow.
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet", ".pq": "parquet",
+    ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow", ".arrows": "arrow",
+}
+
+
+def detect_format(filename: str) -> Optional[str]:
+    return FILE_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _arrow_frame(record_batches) -> pd.DataFrame:
+    import pyarrow as pa
+
+    df = pa.Table.from_batches(record_batches).to_pandas()
+    # Kolom dictionary (mis. kategori dari pandas) -> string biasa seperti hasil CSV
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def _rechunk(record_batches, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Record batch dari file bisa kecil atau sangat besar; samakan ukurannya ~batch_size baris"""
+    pending, rows = [], 0
+    for record_batch in record_batches:
+        for offset in range(0, record_batch.num_rows, batch_size):
+            part = record_batch.slice(offset, batch_size)
+            pending.append(part)
+            rows += part.num_rows
+            if rows >= batch_size:
+                yield _arrow_frame(pending)
+                pending, rows = [], 0
+    if pending:
+        yield _arrow_frame(pending)
+
+
+def iter_parquet_batches(fileobj: BinaryIO, batch_size: int = INGEST_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Parquet dibaca per record batch (tidak load seluruh file); tipe kolom dari schema file"""
+    import pyarrow.parquet as pq # Opsional: hanya di-import untuk upload Parquet
+
+    yield from _rechunk(pq.ParquetFile(fileobj).iter_batches(batch_size=batch_size), batch_size)
+
+
+def iter_arrow_batches(fileobj: BinaryIO, batch_size: int = INGEST_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Arrow IPC: format file (.arrow/.feather v2) atau format stream"""
+    import pyarrow as pa # Opsional: hanya di-import untuk upload Arrow
+
+    try:
+        reader = pa.ipc.open_file(fileobj)
+        record_batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        fileobj.seek(0)
+        record_batches = pa.ipc.open_stream(fileobj)
+    yield from _rechunk(record_batches, batch_size)
+
+
+def iter_file_batches(fileobj: BinaryIO, file_format: str = "csv", batch_size: int = INGEST_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    readers = {"csv": iter_csv_batches, "parquet": iter_parquet_batches, "arrow": iter_arrow_batches}
+    return readers[file_format](fileobj, batch_size)
+
+
+def prepare_lead_rows(df: pd.DataFrame) -> List[dict]:
+    """Samakan nama kolom file (emp.var.rate) dengan kolom DB (emp_var_rate) & NaN -> NULL"""
+    df_db = df.rename(columns=lambda k: k.replace('.', '_'))
+    df_db = df_db[[c for c in df_db.columns if c in LEAD_COLUMNS]]
+    df_db = df_db.astype(object).where(df_db.notna(), None)
+    return df_db.to_dict('records')
+
+
+def insert_scored_batch(db: Session, df: pd.DataFrame, predictions: List[dict]) -> List[int]:
+    """Bulk insert satu batch yang sudah di-score. Return id lead baru."""
+    rows = prepare_lead_rows(df)
+    lead_ids = crud.bulk_create_leads(db, rows, predictions)
+    if EXPLAIN_ON_INGEST:
+        crud.explain_leads(db, lead_ids, rows)
+    return lead_ids
+
+
+def ingest_file(db: Session, fileobj: BinaryIO, file_format: str = "csv",
+                batch_size: int = INGEST_BATCH_SIZE, sample_size: int = 5):
+    """
+    Ingest file (CSV / Parquet / Arrow) lengkap batch demi batch. Scoring dibagi ke process pool,
+    insert tetap berurutan sesuai file. Tiap batch di-commit sendiri.
+    Return (jumlah lead tersimpan, id sampel) -- tidak menyimpan semua id di memori.
+    """
+    processed, sample_ids = 0, []
+    for df, predictions in executors.score_batches(iter_file_batches(fileobj, file_format, batch_size)):
+        if isinstance(predictions, Exception):
+            raise predictions
+        lead_ids = insert_scored_batch(db, df, predictions)
+        processed += len(lead_ids)
+        if len(sample_ids) < sample_size:
+            sample_ids.extend(lead_ids[:sample_size - len(sample_ids)])
+    return processed, sample_ids
+
+
+async def ingest_file_async(db: Session, fileobj: BinaryIO, file_format: str = "csv",
+                            batch_size: int = INGEST_BATCH_SIZE, sample_size: int = 5):
+    """
+    Sama dengan ingest_file, tapi untuk endpoint async: parsing & DB di thread pool,
+    scoring di process pool. Event loop tetap bebas melayani request lain.
+    """
+    processed, sample_ids = 0, []
+    scored_batches = executors.score_batches(iter_file_batches(fileobj, file_format, batch_size))
+    while True:
+        item = await executors.run_io(next, scored_batches, None)
+        if item is None:
+            break
+
+        df, predictions = item
+        if isinstance(predictions, Exception):
+            raise predictions
+        lead_ids = await executors.run_io(insert_scored_batch, db, df, predictions)
+
+        processed += len(lead_ids)
+        if len(sample_ids) < sample_size:
+            sample_ids.extend(lead_ids[:sample_size - len(sample_ids)])
+    return processed, sample_ids
+
+
+# =====================================================
+# BACKGROUND INGEST JOBS
+# =====================================================
+
+_job_pool = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def submit_ingest_job(db: Session, fileobj: BinaryIO, filename: str, file_format: str = "csv") -> models.IngestJob:
+    """
+    Simpan upload ke file sementara (streaming, tanpa load ke memori) lalu
+    serahkan ke worker pool. Return job yang masih berstatus 'queued'.
+    """
+    fd, path = tempfile.mkstemp(suffix=f".{file_format}", dir=INGEST_TMP_DIR)
+    with os.fdopen(fd, "wb") as tmp:
+        shutil.copyfileobj(fileobj, tmp)
+
+    job = crud.create_ingest_job(db, filename)
+    _job_pool.submit(run_ingest_job, job.id, path, file_format)
+    return job
+
+
+def run_ingest_job(job_id: int, path: str, file_format: str = "csv", batch_size: int = INGEST_BATCH_SIZE):
+    """Dijalankan di worker thread: parse -> score -> insert per batch, update progress tiap batch."""
+    db = SessionLocal()
+    started = time.perf_counter()
+    job = None
+    try:
+        job = crud.get_ingest_job(db, job_id)
+        job.status = "running"
+        db.commit()
+
+        # Counter lokal, karena rollback batch yang gagal ikut meng-expire objek job
+        parsed = scored = inserted = failed = 0
+        last_error = None
+        with open(path, "rb") as f:
+            for df, predictions in executors.score_batches(iter_file_batches(f, file_format, batch_size)):
+                parsed += len(df)
+                try:
+                    if isinstance(predictions, Exception):
+                        raise predictions
+                    scored += len(df)
+                    inserted += len(insert_scored_batch(db, df, predictions))
+                except Exception as e:
+                    # Batch gagal tidak menghentikan job, cukup dicatat
+                    failed += len(df)
+                    last_error = str(e)
+
+                job.rows_parsed, job.rows_scored = parsed, scored
+                job.rows_inserted, job.rows_failed = inserted, failed
+                job.error = last_error
+                job.elapsed_seconds = time.perf_counter() - started
+                db.commit()
+
+        job.status = "completed"
+    except Exception as e:
+        traceback.print_exc()
+        db.rollback()
+        job = crud.get_ingest_job(db, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+    finally:
+        if job is not None:
+            job.elapsed_seconds = time.perf_counter() - started
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        db.close()
+        os.remove(path)
@@ -1,17 +1,23 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from sqlalchemy import text  # Tambahan import sesuai permintaan
-from typing import List, Optional
-import pandas as pd
-import io
-
-from jose import JWTError, jwt
-
-from . import models, schemas, crud
-from .database import engine, get_db
-from .ml_service import ml_service
+from typing import List, Optional, Literal
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import asyncio
+
+from jose import JWTError
+
+from . import models, schemas, crud, ingest, rescore, export, batching, executors, migrations
+from .database import engine, get_db, pool_stats, SessionLocal
+from .cache import response_cache
+from .serialization import FastJSONResponse
+from .ml_service import ml_service, list_versions, ML_READY_TIMEOUT
+from .startup import startup
 from . import auth
 
 if __name__ == "__main__":
@@ -20,15 +26,50 @@ if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("app.main:app", host="0.0.0.0", port=port)
 
+# Komponen yang menentukan /api/v1/ready. Worker scoring tidak termasuk: upload tetap
+# jalan (worker di-spawn saat dipakai) walau prewarm belum selesai.
+READY_COMPONENTS = ("database", "model", "features", "explainer")
+
+async def _load_in_background():
+    # Model + features paralel lalu explainer
+    await asyncio.to_thread(ml_service.load)
+    # Baru setelah itu spawn worker scoring (booster + encoder sendiri), tidak berebut CPU dengan load di atas
+    if executors.SCORING_PROCESSES > 0:
+        await asyncio.to_thread(startup.run, "scoring_pool", executors.prewarm)
+    # Rescore job yang terhenti karena restart dilanjutkan dari checkpoint
+    resumed = await asyncio.to_thread(rescore.resume_unfinished_jobs)
+    if resumed:
+        print(f"🔁 Resuming rescore jobs: {resumed}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.register(*READY_COMPONENTS)
+    # Tabel dibutuhkan semua endpoint -> ditunggu, tapi di thread (tidak di import time)
+    def prepare_database():
+        models.Base.metadata.create_all(bind=engine)
+        migrations.ensure_columns(engine)
+        # Counter dashboard dibangun sekali di sini, bukan di request baca pertama
+        db = SessionLocal()
+        try:
+            if crud.initialize_lead_stats(db):
+                print("📊 Dashboard counters initialized from leads table")
+        finally:
+            db.close()
+    await asyncio.to_thread(startup.run, "database", prepare_database)
+    # Model di-load di background: leads, login, dll langsung bisa melayani request
+    loader = asyncio.create_task(_load_in_background())
+    yield
+    loader.cancel()
+    executors.shutdown()
+
 app = FastAPI(
     title="SmartConvert CRM API",
     description="Backend API with Batch Upload & Prediction Capability",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# PINDAHKAN INI KE SINI (Setelah FastAPI init agar lebih stabil)
-models.Base.metadata.create_all(bind=engine)
-
 # --- KONFIGURASI CORS ---
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +84,26 @@ class BulkActionRequest(schemas.BaseModel):
     lead_ids: List[int]
     status: Optional[str] = None
 
+def cached_json(request: Request, key: str, compute):
+    """
+    Response cache + ETag untuk endpoint read-heavy.
+    Jika If-None-Match masih sama dengan generation sekarang dan entry cache-nya
+    masih dalam TTL -> 304 tanpa menyentuh DB. Entry kedaluwarsa -> hitung ulang (200),
+    supaya write dari worker/proses lain tetap terlihat paling lambat setelah TTL.
+    """
+    generation = response_cache.generation
+    etag = response_cache.etag(key, generation)
+    if request.headers.get("if-none-match") == etag and response_cache.is_cached(key, generation):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    data = response_cache.get_or_set(key, lambda: jsonable_encoder(compute()), generation)
+    return JSONResponse(content=data, headers={"ETag": etag})
+
+async def require_model():
+    """Dependency untuk endpoint yang butuh model: tunggu load startup (maks ML_READY_TIMEOUT)"""
+    if not ml_service.is_loaded and not await asyncio.to_thread(ml_service.wait_loaded, ML_READY_TIMEOUT):
+        raise HTTPException(status_code=503, detail="Model is still loading", headers={"Retry-After": "5"})
+
 @app.get("/")
 def read_root():
     return {"message": "SmartConvert API is running 🚀"}
@@ -64,6 +125,20 @@ def health_check(db: Session = Depends(get_db)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+
+@app.get("/api/v1/ready")
+def readiness_check():
+    """
+    Readiness probe: status & durasi startup tiap komponen.
+    200 jika database & model siap, 503 selama model masih di-load (atau gagal).
+    Status prewarm worker scoring ikut ditampilkan tapi tidak menahan readiness.
+    """
+    ready = startup.is_ready(*READY_COMPONENTS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": startup.snapshot()}
+    )
+
 # =====================================================
 # AUTH & JWT DEPENDENCY
 # =====================================================
@@ -73,83 +148,146 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/login")
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-):
+) -> auth.Principal:
+    """
+    Verifikasi token & lookup user, keduanya di-cache (auth.TOKEN_CACHE_TTL_SECONDS /
+    PRINCIPAL_CACHE_TTL_SECONDS): request berulang tidak decode JWT maupun query DB lagi.
+    """
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token,
-            auth.SECRET_KEY,
-            algorithms=[auth.ALGORITHM]
-        )
-        username: str = payload.get("sub")
+        username = auth.decode_token_subject(token)
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = crud.get_user_by_username(db, username=username)
-    if user is None:
+    principal = auth.get_cached_principal(username)
+    if principal is None:
+        user = crud.get_user_by_username(db, username=username)
+        if user is None:
+            raise credentials_exception
+        principal = auth.cache_principal(user)
+
+    # User yang dinonaktifkan tidak boleh memakai token lamanya
+    if not principal.is_active:
         raise credentials_exception
 
-    return user
+    return principal
+
+
+@app.get("/api/v1/db/pool-stats")
+def read_pool_stats(current_user: auth.Principal = Depends(get_current_user)):
+    """Status connection pool + histogram lama tunggu checkout (untuk tuning DB_POOL_*)"""
+    return pool_stats()
 
 # =====================================================
-# CSV UPLOAD & ML
+# CSV / PARQUET / ARROW UPLOAD & ML
 # =====================================================
 
+def upload_format(file: UploadFile) -> str:
+    """Format dari ekstensi file; Parquet & Arrow butuh pyarrow"""
+    file_format = ingest.detect_format(file.filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="File must be a CSV, Parquet or Arrow IPC file")
+    if file_format != "csv" and not ingest.pyarrow_available():
+        raise HTTPException(status_code=400, detail=f"{file_format.capitalize()} upload requires pyarrow")
+    return file_format
+
 @app.post("/api/v1/upload-csv")
+@app.post("/api/v1/upload")
 async def upload_leads_csv(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    _: None = Depends(require_model)
 ):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    file_format = upload_format(file)
 
     try:
-        contents = await file.read()
-        try:
-            df = pd.read_csv(io.StringIO(contents.decode('utf-8')), sep=';')
-            if df.shape[1] < 2:
-                df = pd.read_csv(io.StringIO(contents.decode('utf-8')), sep=',')
-        except:
-            df = pd.read_csv(io.StringIO(contents.decode('utf-8')), sep=',')
-
-        results = []
-        for _, row in df.iterrows():
-            lead_data_raw = row.to_dict()
-            prediction = ml_service.predict(lead_data_raw)
-
-            lead_data_for_db = {}
-            valid_db_columns = models.Lead.__table__.columns.keys()
-
-            for k, v in lead_data_raw.items():
-                clean_key = k.replace('.', '_')
-                if clean_key in valid_db_columns:
-                    lead_data_for_db[clean_key] = v
-
-            saved_lead = crud.create_lead(db, lead_data_for_db, prediction)
-            results.append(saved_lead)
+        # Streaming: UploadFile.file dibaca per batch, tidak di-decode utuh ke memori.
+        # Parquet/Arrow langsung jadi kolom bertipe (tanpa parsing teks).
+        # Parsing & DB di thread pool, scoring di process pool -> event loop tidak terblokir
+        processed, sample_ids = await ingest.ingest_file_async(db, file.file, file_format)
 
         return {
             "status": "success",
-            "message": f"Successfully processed {len(results)} leads",
-            "sample_data": results[:5]
+            "message": f"Successfully processed {processed} leads",
+            "sample_data": await executors.run_io(crud.get_leads_by_ids, db, sample_ids)
         }
 
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error processing CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing {file_format.upper()}: {str(e)}")
+
+# =====================================================
+# BACKGROUND INGEST JOBS (UNTUK FILE BESAR)
+# =====================================================
+
+@app.post("/api/v1/ingest-jobs", response_model=schemas.IngestJobResponse, status_code=202)
+def create_ingest_job(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Langsung mengembalikan job id; parsing, scoring & insert berjalan di worker pool.
+    Pantau progres lewat GET /api/v1/ingest-jobs/{job_id}.
+    """
+    return ingest.submit_ingest_job(db, file.file, file.filename, upload_format(file))
+
+
+@app.get("/api/v1/ingest-jobs/{job_id}", response_model=schemas.IngestJobResponse)
+def read_ingest_job(job_id: int, db: Session = Depends(get_db)):
+    job = crud.get_ingest_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
+# =====================================================
+# RESCORE JOBS (SETELAH MODEL DIGANTI)
+# =====================================================
+
+@app.post("/api/v1/rescore-jobs", response_model=schemas.RescoreJobResponse, status_code=202)
+def create_rescore_job(
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user),
+    _: None = Depends(require_model)
+):
+    """
+    Hitung ulang skor semua lead dengan versi model aktif, di background.
+    Pantau progres lewat GET /api/v1/rescore-jobs/{job_id}.
+    """
+    return rescore.submit_rescore_job(db)
+
+
+@app.get("/api/v1/rescore-jobs/{job_id}", response_model=schemas.RescoreJobResponse)
+def read_rescore_job(job_id: int, db: Session = Depends(get_db)):
+    job = crud.get_rescore_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rescore job not found")
+    return job
+
+
+@app.post("/api/v1/rescore-jobs/{job_id}/resume", response_model=schemas.RescoreJobResponse, status_code=202)
+def resume_rescore_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user)
+):
+    """Lanjutkan job yang gagal dari checkpoint terakhir"""
+    job = rescore.resume_rescore_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Rescore job not found")
+    return job
 
 # =====================================================
 # LEADS (WITH ENHANCED FILTERING & PAGINATION INFO)
 # =====================================================
 
-@app.get("/api/v1/leads")
+@app.get("/api/v1/leads", response_model=schemas.LeadListResponse)
 def read_leads(
     skip: int = 0, 
     limit: int = 100, 
@@ -159,18 +297,68 @@ def read_leads(
     max_age: Optional[int] = None, 
     min_score: Optional[float] = None,
     status: Optional[str] = None, # Parameter baru
+    cursor: Optional[str] = None,
+    count: Literal["exact", "approximate", "none"] = "exact",
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     Mengambil daftar leads dengan dukungan filter dan pagination info.
+    Untuk infinite scroll, kirim `next_cursor` dari respons sebelumnya sebagai `cursor`
+    (keyset pagination) dan `count=approximate`/`none` agar tidak ada COUNT(*) di tiap halaman.
+    `fields=list` (kolom tabel leads) atau `fields=id,job,age` hanya mengambil & mengirim kolom itu.
     """
-    total, data = crud.get_leads(
-        db, skip=skip, limit=limit, sort_by=sort_by, 
-        job=job, min_age=min_age, max_age=max_age, 
-        min_score=min_score, status=status # Kirim status ke CRUD
-    )
+    try:
+        total, data, next_cursor = crud.get_leads(
+            db, skip=skip, limit=limit, sort_by=sort_by, 
+            job=job, min_age=min_age, max_age=max_age, 
+            min_score=min_score, status=status, # Kirim status ke CRUD
+            cursor=cursor, count=count, fields=crud.parse_lead_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {"total_found": total, "data": data}
+    # Data sudah berupa dict tipe dasar -> langsung di-dump (orjson), tanpa jsonable_encoder per baris
+    return FastJSONResponse({"total_found": total, "data": data, "next_cursor": next_cursor})
+
+
+# Harus didaftarkan sebelum /leads/{lead_id} agar "export" tidak dianggap lead_id
+@app.get("/api/v1/leads/export")
+def export_leads(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    sort_by: str = "newest",
+    job: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    min_score: Optional[float] = None,
+    status: Optional[str] = None,
+    current_user: auth.Principal = Depends(get_current_user)
+):
+    """
+    Export semua lead yang cocok dengan filter /api/v1/leads dalam satu response streaming
+    (tanpa pagination). Data dibaca per batch dari server-side cursor, memori server konstan.
+    """
+    if format == "parquet" and not export.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+
+    def stream():
+        # Session sendiri: generator berjalan setelah endpoint return (dan dependency ditutup)
+        db = SessionLocal()
+        try:
+            batches = crud.iter_leads_export(
+                db, job=job, min_age=min_age, max_age=max_age,
+                min_score=min_score, status=status, sort_by=sort_by,
+                batch_size=export.EXPORT_BATCH_SIZE
+            )
+            yield from export.WRITERS[format](batches)
+        finally:
+            db.close()
+
+    filename = f"leads-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream(), media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @app.get("/api/v1/leads/{lead_id}", response_model=schemas.LeadResponse)
@@ -179,9 +367,8 @@ def read_lead(lead_id: int, db: Session = Depends(get_db)):
     if db_lead is None:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    lead_dict = db_lead.__dict__.copy()
-    explanation = ml_service.explain_prediction(lead_dict)
-    db_lead.explanation = explanation
+    # Explanation dibaca dari cache DB (dihitung sekali per versi model)
+    db_lead.explanation = crud.get_lead_explanation(db, db_lead)
 
     return db_lead
 
@@ -191,26 +378,17 @@ def update_lead_progress(lead_id: int, data: dict, db: Session = Depends(get_db)
     """
     Memperbarui progres lead termasuk catatan dan status.
     """
-    db_lead = crud.get_lead_by_id(db, lead_id=lead_id)
+    db_lead = crud.update_lead_progress(db, lead_id, data)
     if not db_lead:
         raise HTTPException(status_code=404, detail="Lead not found")
-    
-    # Update catatan jika ada
-    if "notes" in data:
-        db_lead.notes = data.get("notes")
-    
-    # Update status jika ada
-    if "status" in data:
-        db_lead.status = data.get("status")
-        
-    db.commit()
+
     return {"status": "success", "message": "Progress updated"}
 
 
 @app.delete("/api/v1/leads/all")
 def clear_leads_database(
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)
+    current_user: auth.Principal = Depends(get_current_user)
 ):
     success = crud.delete_all_leads(db)
     if not success:
@@ -224,7 +402,7 @@ def clear_leads_database(
 def bulk_delete(
     request: BulkActionRequest, 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)
+    current_user: auth.Principal = Depends(get_current_user)
 ):
     success = crud.bulk_delete_leads(db, request.lead_ids)
     if not success:
@@ -235,7 +413,7 @@ def bulk_delete(
 def bulk_status_update(
     request: BulkActionRequest, 
     db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)
+    current_user: auth.Principal = Depends(get_current_user)
 ):
     if not request.status:
         raise HTTPException(status_code=400, detail="Status diperlukan")
@@ -249,8 +427,8 @@ def bulk_status_update(
 # =====================================================
 
 @app.get("/api/v1/dashboard/stats", response_model=schemas.DashboardStats)
-def read_stats(db: Session = Depends(get_db)):
-    return crud.get_dashboard_stats(db)
+def read_stats(request: Request, db: Session = Depends(get_db)):
+    return cached_json(request, "dashboard_stats", lambda: crud.get_dashboard_stats(db))
 
 # =====================================================
 # USER PROFILE (PROTECTED)
@@ -258,10 +436,14 @@ def read_stats(db: Session = Depends(get_db)):
 
 @app.get("/api/v1/user/profile")
 def read_user_profile(
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: auth.Principal = Depends(get_current_user)
 ):
-    return crud.get_user_profile(db, user_id=current_user.id)
+    return cached_json(
+        request, f"user_profile:{current_user.id}",
+        lambda: crud.get_user_profile(db, user_id=current_user.id)
+    )
 
 
 @app.put("/api/v1/user/profile")
@@ -276,21 +458,35 @@ def update_profile(
 # =====================================================
 
 @app.post("/api/v1/register")
-def register_user(user_data: dict, db: Session = Depends(get_db)):
-    existing_user = crud.get_user_by_username(db, username=user_data['username'])
+async def register_user(user_data: dict, db: Session = Depends(get_db)):
+    existing_user = await executors.run_io(crud.get_user_by_username, db, username=user_data['username'])
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    return crud.create_user(db, user_data)
+    # bcrypt di executor khusus -> tidak memakan threadpool endpoint lain
+    try:
+        hashed_pwd = await auth.get_password_hash_async(user_data['password'])
+    except auth.PasswordPoolBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return await executors.run_io(crud.create_user, db, user_data, hashed_pwd)
 
 
 @app.post("/api/v1/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = crud.get_user_by_username(db, username=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    user = await executors.run_io(crud.get_user_by_username, db, username=form_data.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+    try:
+        valid, new_hash = await auth.verify_password_async(form_data.password, user.hashed_password)
+    except auth.PasswordPoolBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
+    if new_hash:
+        # Rehash transparan: cost bcrypt berubah sejak hash ini dibuat
+        await executors.run_io(crud.update_password_hash, db, user, new_hash)
 
     access_token = auth.create_access_token(
         data={"sub": user.username}
@@ -300,32 +496,81 @@ def login(
         "token_type": "bearer"
     }
 
+
+@app.get("/api/v1/auth/password-pool-stats")
+def read_password_pool_stats(current_user: auth.Principal = Depends(get_current_user)):
+    """Antrean & durasi bcrypt (untuk tuning PASSWORD_HASH_WORKERS / BCRYPT_ROUNDS)"""
+    return auth.password_pool.stats()
+
 @app.get("/api/v1/ai/insights")
-def read_ai_insights(current_user: models.User = Depends(get_current_user)):
-    return crud.get_ai_model_insights()
+def read_ai_insights(
+    request: Request,
+    current_user: auth.Principal = Depends(get_current_user),
+    _: None = Depends(require_model) # Metrik berasal dari metadata model -> jangan cache versi kosong
+):
+    return cached_json(request, "ai_insights", crud.get_ai_model_insights)
 
 # AI Simulator Endpoint
 @app.post("/api/v1/ai/simulate")
-def simulate_prediction(
+async def simulate_prediction(
     data: dict, 
-    db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)
+    current_user: auth.Principal = Depends(get_current_user),
+    _: None = Depends(require_model)
 ):
     """
     Simulator AI: Menerima input fitur secara manual dan mengembalikan 
     prediksi serta penjelasan SHAP secara real-time.
+    Request bersamaan digabung oleh micro-batcher menjadi satu matriks.
     """
     try:
-        # 1. Jalankan Prediksi
-        prediction = ml_service.predict(data)
-        
-        # 2. Jalankan Penjelasan SHAP (XAI)
-        explanation = ml_service.explain_prediction(data)
+        # 1. Jalankan Prediksi & 2. Penjelasan SHAP (XAI) secara bersamaan
+        prediction, explanation = await asyncio.gather(
+            batching.predict_batcher.submit(data),
+            batching.explain_batcher.submit(data),
+        )
         
         return {
             "score": prediction.get("score"),
             "label": prediction.get("label"),
             "explanation": explanation
         }
+    except batching.QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Simulator busy: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
+
+
+@app.get("/api/v1/ai/models")
+def read_model_registry(current_user: auth.Principal = Depends(get_current_user)):
+    """Versi aktif + metadata-nya, dan semua versi di registry"""
+    return {
+        "active": ml_service.model_version,
+        "metadata": ml_service.metadata,
+        "versions": list_versions(),
+    }
+
+
+@app.post("/api/v1/ai/models/reload")
+async def reload_model(
+    request: Optional[schemas.ModelReloadRequest] = None,
+    current_user: auth.Principal = Depends(get_current_user)
+):
+    """
+    Hot reload: versi baru di-load & warm-up di background, lalu ditukar secara atomic.
+    Request yang sedang berjalan selesai dengan versi lama. Tanpa `version` = baca ulang registry/ACTIVE.
+    """
+    try:
+        result = await asyncio.to_thread(ml_service.reload, request.version if request else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response_cache.invalidate() # Insights ikut metadata versi baru
+    return result
+
+
+@app.get("/api/v1/ai/batching-stats")
+def read_batching_stats(current_user: auth.Principal = Depends(get_current_user)):
+    """Histogram ukuran batch & latency micro-batcher (untuk tuning MICROBATCH_*)"""
+    return {
+        "predict": batching.predict_batcher.stats(),
+        "explain": batching.explain_batcher.stats(),
+    }
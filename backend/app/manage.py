@@ -0,0 +1,170 @@
+"""
+Perintah maintenance backend.
+
+Contoh:
+    python -m app.manage migrate
+    python -m app.manage rebuild-stats
+    python -m app.manage explain
+    python -m app.manage export-model
+    python -m app.manage rescore [--job ID]
+    python -m app.manage set-user-active alice --inactive
+    python -m app.manage register-model v3 --model model.ubj --features features.json --metadata meta.json --activate
+"""
+import argparse
+import json
+
+from . import crud, migrations, query_advisor
+from .database import Base, SessionLocal, engine
+
+
+def migrate(args):
+    created = migrations.upgrade(engine)
+    print(
+        f"✅ Schema up to date ({len(created['columns'])} kolom ditambah: {', '.join(created['columns']) or '-'}; "
+        f"{len(created['indexes'])} index dibuat: {', '.join(created['indexes']) or '-'})"
+    )
+    db = SessionLocal()
+    try:
+        if crud.initialize_lead_stats(db):
+            print("✅ Dashboard counters initialized from leads table")
+    finally:
+        db.close()
+
+
+def rebuild_stats(args):
+    db = SessionLocal()
+    try:
+        n = crud.rebuild_lead_stats(db)
+        print(f"✅ Dashboard counters rebuilt ({n} buckets)")
+    finally:
+        db.close()
+
+
+def explain(args):
+    db = SessionLocal()
+    try:
+        report = query_advisor.explain_crud_queries(db)
+    finally:
+        db.close()
+
+    flagged = 0
+    for item in report:
+        if item["seq_scan"] and not item["expected"]:
+            flagged += 1
+            status = "⚠️ SEQ SCAN"
+        elif item["seq_scan"]:
+            status = "ℹ️ full scan (expected)"
+        else:
+            status = "✅ index"
+        print(f"{status:<26} {item['name']}")
+        if args.verbose or (item["seq_scan"] and not item["expected"]):
+            for line in item["plan"]:
+                print(f"{'':<26}   {line}")
+    print(f"\n{flagged} query melakukan sequential scan pada tabel leads")
+
+
+def export_model(args):
+    # Import di sini: perintah lain tidak perlu memuat model
+    from .ml_service import ml_service, BOOSTER_PATH
+
+    ml_service.load()
+    if not ml_service.model:
+        raise SystemExit("❌ Model belum ter-load, tidak ada yang bisa di-export")
+    path = ml_service.export_booster(args.output or BOOSTER_PATH)
+    print(f"✅ Booster exported to {path}")
+
+
+def register_model(args):
+    from .ml_service import register_version, FEATURES_PATH
+
+    metadata = None
+    if args.metadata:
+        with open(args.metadata) as f:
+            metadata = json.load(f)
+    path = register_version(
+        args.version, model_path=args.model, features_path=args.features or FEATURES_PATH,
+        metadata=metadata, activate=args.activate,
+    )
+    print(f"✅ Model {args.version} registered at {path}{' (active)' if args.activate else ''}")
+    if args.activate:
+        print("ℹ️ Server yang sedang jalan: POST /api/v1/ai/models/reload untuk memakai versi ini tanpa restart")
+
+
+def rescore_leads(args):
+    from . import rescore
+    from .ml_service import ml_service
+
+    ml_service.load()
+    db = SessionLocal()
+    try:
+        job = crud.get_rescore_job(db, args.job) if args.job else crud.create_rescore_job(db, ml_service.model_version)
+        if job is None:
+            raise SystemExit(f"❌ Rescore job {args.job} tidak ditemukan")
+        job_id = job.id
+    finally:
+        db.close()
+
+    print(f"🔁 Rescore job {job_id} ({ml_service.model_version})")
+    rescore.run_rescore_job(job_id, batch_size=args.batch_size or rescore.RESCORE_BATCH_SIZE, pause=args.pause)
+
+    db = SessionLocal()
+    try:
+        job = crud.get_rescore_job(db, job_id)
+        print(f"{'✅' if job.status == 'completed' else '❌'} {job.status}: {job.rows_rescored}/{job.total_leads} lead, "
+              f"{job.rows_per_second} rows/s{f' ({job.error})' if job.error else ''}")
+    finally:
+        db.close()
+
+
+def set_user_active(args):
+    db = SessionLocal()
+    try:
+        user = crud.set_user_active(db, args.username, not args.inactive)
+    finally:
+        db.close()
+    if user is None:
+        raise SystemExit(f"❌ User {args.username} tidak ditemukan")
+    print(f"✅ User {args.username} {'nonaktif' if args.inactive else 'aktif'}")
+    # Cache principal ada di memori proses server; proses lain menyusul setelah TTL
+    print("ℹ️ Server yang sedang jalan memakai status baru maksimal setelah PRINCIPAL_CACHE_TTL_SECONDS")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="SmartConvert maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("migrate", help="Buat tabel & index yang belum ada").set_defaults(func=migrate)
+    sub.add_parser("rebuild-stats", help="Hitung ulang tabel lead_stats dari tabel leads").set_defaults(func=rebuild_stats)
+    explain_parser = sub.add_parser("explain", help="EXPLAIN setiap query crud dan tandai sequential scan")
+    explain_parser.add_argument("-v", "--verbose", action="store_true", help="Tampilkan plan semua query")
+    explain_parser.set_defaults(func=explain)
+    export_parser = sub.add_parser("export-model", help="Export booster ke format native XGBoost (.ubj/.json)")
+    export_parser.add_argument("-o", "--output", help="Path tujuan (default: ML_BOOSTER_PATH)")
+    export_parser.set_defaults(func=export_model)
+    rescore_parser = sub.add_parser("rescore", help="Hitung ulang skor semua lead dengan model aktif")
+    rescore_parser.add_argument("--job", type=int, help="Lanjutkan job yang ada dari checkpoint")
+    rescore_parser.add_argument("--batch-size", type=int, help="Default: RESCORE_BATCH_SIZE")
+    rescore_parser.add_argument("--pause", type=float, default=0.0, help="Jeda antar batch (detik)")
+    rescore_parser.set_defaults(func=rescore_leads)
+    user_parser = sub.add_parser("set-user-active", help="Aktifkan / nonaktifkan user")
+    user_parser.add_argument("username")
+    user_parser.add_argument("--inactive", action="store_true", help="Nonaktifkan (default: aktifkan)")
+    user_parser.set_defaults(func=set_user_active)
+    register_parser = sub.add_parser("register-model", help="Tambah versi model ke registry (default: artefak pkl lama)")
+    register_parser.add_argument("version", help="Nama versi, mis. v3 atau 2026-10-18")
+    register_parser.add_argument("--model", help="File model (.ubj/.json/.pkl)")
+    register_parser.add_argument("--features", help="JSON daftar fitur (default: model_features.json)")
+    register_parser.add_argument("--metadata", help="JSON metadata: metrics, thresholds, model_name, ...")
+    register_parser.add_argument("--activate", action="store_true", help="Jadikan versi aktif")
+    register_parser.set_defaults(func=register_model)
+
+    args = parser.parse_args(argv)
+    # Tabel & kolom baru dibuat otomatis (query crud memilih semua kolom models.Lead);
+    # index hanya lewat "migrate" agar "explain" menunjukkan kondisi asli
+    Base.metadata.create_all(bind=engine)
+    migrations.ensure_columns(engine)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Migrasi skema ringan tanpa Alembic.
+
+create_all() hanya membuat tabel yang belum ada; index baru pada tabel yang
+sudah berisi data (mis. tabel leads di Supabase) tidak ikut dibuat, begitu juga
+kolom baru. Modul ini menambahkan bagian yang kurang secara idempotent.
+"""
+from sqlalchemy import inspect, text
+
+from .database import Base
+
+
+def ensure_columns(engine):
+    """
+    Tambah kolom nullable yang dideklarasikan di models tapi belum ada di tabel
+    (ALTER TABLE ... ADD COLUMN, tanpa default -> tidak menulis ulang tabel di Postgres).
+    Return: list "tabel.kolom" yang ditambahkan.
+    """
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    added = []
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            # Kolom NOT NULL / primary key baru butuh migrasi data manual
+            if column.name in existing or not column.nullable or column.primary_key:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+            added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def ensure_indexes(engine):
+    """
+    Buat index yang dideklarasikan di models tapi belum ada di database.
+    Di Postgres memakai CREATE INDEX CONCURRENTLY agar tabel leads tidak terkunci dari write.
+    Return: list nama index yang dibuat.
+    """
+    inspector = inspect(engine)
+    is_postgres = engine.dialect.name == "postgresql"
+    created = []
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index._ddl_if is not None and index._ddl_if.dialect not in (None, engine.dialect.name):
+                continue
+
+            if is_postgres:
+                # CONCURRENTLY tidak boleh di dalam transaksi
+                index.dialect_options["postgresql"]["concurrently"] = True
+                try:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        index.create(conn)
+                finally:
+                    index.dialect_options["postgresql"]["concurrently"] = False
+            else:
+                with engine.begin() as conn:
+                    index.create(conn)
+            created.append(index.name)
+
+    return created
+
+
+def upgrade(engine):
+    """Buat tabel baru, lengkapi kolom lalu index yang kurang"""
+    Base.metadata.create_all(bind=engine)
+    return {"columns": ensure_columns(engine), "indexes": ensure_indexes(engine)}
@@ -2,133 +2,429 @@ import pandas as pd
 import pickle
 import json
 import os
-import shap # Pastikan library shap terinstall
+import threading
+import time
 import numpy as np
+import xgboost as xgb
+from concurrent.futures import ThreadPoolExecutor
+
+from .feature_encoder import FeatureEncoder
+from .cache import response_cache
+from .startup import startup
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "../ml_assets/xgboost_tuned_v2.pkl")
+# Booster format native XGBoost (.ubj / .json), hasil "python -m app.manage export-model".
+# Jika ada, dipakai langsung tanpa unpickle wrapper sklearn.
+BOOSTER_PATH = os.getenv("ML_BOOSTER_PATH", os.path.splitext(MODEL_PATH)[0] + ".ubj")
 FEATURES_PATH = os.path.join(BASE_DIR, "../ml_assets/model_features.json")
+# Versi untuk artefak lama di atas (dipakai jika registry kosong)
+LEGACY_VERSION = os.path.splitext(os.path.basename(MODEL_PATH))[0]
 
-class MLService:
-    def __init__(self):
-        self.model = None
-        self.explainer = None # Siapkan tempat untuk SHAP Explainer
+# Registry model berversi:
+#   registry/<versi>/model.ubj (atau model.json / model.pkl)
+#   registry/<versi>/metadata.json  {"features": [...], "metrics": {...}, "thresholds": {...}, ...}
+#   registry/ACTIVE                 nama versi aktif
+REGISTRY_DIR = os.getenv("ML_REGISTRY_DIR", os.path.join(BASE_DIR, "../ml_assets/registry"))
+ACTIVE_FILE = os.path.join(REGISTRY_DIR, "ACTIVE")
+MODEL_FILES = ("model.ubj", "model.json", "model.pkl")
+
+DEFAULT_THRESHOLDS = {"high": 0.7, "medium": 0.3}
+# Metadata hasil evaluasi model V2 (artefak lama belum punya metadata.json)
+LEGACY_METADATA = {
+    "model_name": "XGBoost Classifier v2.0",
+    "last_trained": "2026-01-03",
+    "metrics": {
+        "accuracy": 0.8537,
+        "precision": 0.4064,
+        "recall": 0.6476,
+        "f1_score": 0.4994
+    },
+    "feature_importance": [
+        {"name": "nr.employed", "impact": 0.52, "type": "Economic"},
+        {"name": "euribor3m", "impact": 0.14, "type": "Economic"},
+        {"name": "contact_telephone", "impact": 0.12, "type": "Campaign"},
+        {"name": "cons.conf.idx", "impact": 0.11, "type": "Economic"},
+        {"name": "pernah_dihubungi", "impact": 0.08, "type": "History"},
+        {"name": "age", "impact": 0.04, "type": "Demographic"}
+    ],
+    "thresholds": DEFAULT_THRESHOLDS,
+}
+
+# Backend explainer: "native" (pred_contribs XGBoost) atau "shap" (library shap, opsional)
+EXPLAINER_BACKEND = os.getenv("ML_EXPLAINER_BACKEND", "native")
+# Jumlah thread XGBoost untuk inference (batch besar diparalelkan antar core)
+ML_NTHREAD = int(os.getenv("ML_NTHREAD", os.cpu_count() or 1))
+# Batas tunggu (detik) endpoint yang butuh model saat model masih di-load
+ML_READY_TIMEOUT = float(os.getenv("ML_READY_TIMEOUT", 30))
+
+def list_versions() -> list:
+    """Versi yang ada di registry (folder yang punya metadata.json), urut nama"""
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(REGISTRY_DIR)
+        if os.path.isfile(os.path.join(REGISTRY_DIR, name, "metadata.json"))
+    )
+
+def resolve_version(version: str = None) -> str:
+    """Urutan: argumen > env ML_MODEL_VERSION > file ACTIVE > versi terbaru di registry > artefak lama"""
+    version = version or os.getenv("ML_MODEL_VERSION")
+    if not version and os.path.exists(ACTIVE_FILE):
+        with open(ACTIVE_FILE) as f:
+            version = f.read().strip()
+
+    versions = list_versions()
+    if version:
+        if version not in versions and version != LEGACY_VERSION:
+            raise ValueError(f"Unknown model version: {version}")
+        return version
+    return versions[-1] if versions else LEGACY_VERSION
+
+def _write_atomic(path: str, content: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+def _load_booster(path: str) -> xgb.Booster:
+    if path.endswith(".pkl"):
+        with open(path, 'rb') as f:
+            return pickle.load(f).get_booster()
+    return xgb.Booster(model_file=path)
+
+def register_version(version: str, model_path: str = None, features_path: str = FEATURES_PATH,
+                     metadata: dict = None, activate: bool = False) -> str:
+    """
+    Tambah versi baru ke registry. Model disimpan ulang sebagai booster native (.ubj).
+    Default-nya mendaftarkan artefak lama (pkl + model_features.json).
+    """
+    version_dir = os.path.join(REGISTRY_DIR, version)
+    if os.path.exists(version_dir):
+        raise ValueError(f"Model version already exists: {version}")
+
+    model_path = model_path or (BOOSTER_PATH if os.path.exists(BOOSTER_PATH) else MODEL_PATH)
+    booster = _load_booster(model_path)
+    with open(features_path, 'r') as f:
+        features = json.load(f)
+    metadata = {**(LEGACY_METADATA if metadata is None else metadata), "features": features}
+    metadata.setdefault("thresholds", DEFAULT_THRESHOLDS)
+
+    os.makedirs(version_dir)
+    booster.save_model(os.path.join(version_dir, "model.ubj"))
+    # metadata.json ditulis terakhir: folder tanpa metadata tidak dianggap versi
+    _write_atomic(os.path.join(version_dir, "metadata.json"), json.dumps(metadata, indent=2))
+    if activate:
+        set_active_version(version)
+    return version_dir
+
+def set_active_version(version: str):
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    _write_atomic(ACTIVE_FILE, version + "\n")
+
+class NativeTreeExplainer:
+    """
+    TreeSHAP exact bawaan XGBoost: Booster.predict(pred_contribs=True).
+    Nilainya sama dengan shap.TreeExplainer (output raw/log-odds), tapi tanpa
+    import library shap dan langsung vectorized untuk satu DMatrix penuh.
+    iteration_range sama dengan scoring (best_iteration jika ada early stopping),
+    supaya explanation menjelaskan skor yang ditampilkan.
+    """
+
+    def __init__(self, booster: xgb.Booster, iteration_range: tuple = (0, 0)):
+        self.booster = booster
+        self.iteration_range = iteration_range
+
+    def shap_values(self, X: pd.DataFrame) -> np.ndarray:
+        contribs = self.booster.predict(xgb.DMatrix(X), pred_contribs=True, iteration_range=self.iteration_range)
+        return contribs[:, :-1] # kolom terakhir = bias (expected value)
+
+class ModelBundle:
+    """
+    Satu versi model lengkap: booster, fitur/encoder, explainer & metadata.
+    Tidak diubah setelah dipasang sebagai versi aktif; hot reload membuat bundle baru.
+    """
+
+    def __init__(self, version: str, explainer_backend: str = EXPLAINER_BACKEND, nthread: int = ML_NTHREAD):
+        self.version = version
+        self.explainer_backend = explainer_backend
+        self.nthread = nthread
+        self.model = None # xgb.Booster (inference engine ringan, tanpa wrapper sklearn)
+        self.iteration_range = (0, 0)
+        self.explainer = None
+        self.metadata = {}
+        self.thresholds = DEFAULT_THRESHOLDS
         self.EXPECTED_COLUMNS = []
-        
-        self.load_model()
-        self.load_features()
-        self.init_explainer() # Inisialisasi explainer
+        self.encoder = None # Encoder fitur, dibangun sekali dari daftar fitur
+
+    def model_path(self) -> str:
+        if self.version == LEGACY_VERSION:
+            return BOOSTER_PATH if os.path.exists(BOOSTER_PATH) else MODEL_PATH
+        for name in MODEL_FILES:
+            path = os.path.join(REGISTRY_DIR, self.version, name)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No model file for version {self.version}")
 
     def load_model(self):
         try:
-            with open(MODEL_PATH, 'rb') as f:
-                self.model = pickle.load(f)
-            print("✅ Model loaded successfully")
+            path = self.model_path()
+            self.model = _load_booster(path)
+            self.model.set_param({"nthread": self.nthread})
+            # Samakan dengan XGBClassifier.predict_proba: pakai best_iteration jika ada early stopping
+            best_iteration = self.model.attr("best_iteration")
+            self.iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+            print(f"✅ Model loaded successfully ({self.version}: {os.path.basename(path)})")
         except Exception as e:
             print(f"❌ Error loading model: {e}")
 
     def load_features(self):
         try:
-            with open(FEATURES_PATH, 'r') as f:
-                self.EXPECTED_COLUMNS = json.load(f)
+            if self.version == LEGACY_VERSION:
+                with open(FEATURES_PATH, 'r') as f:
+                    self.metadata = {**LEGACY_METADATA, "features": json.load(f)}
+            else:
+                with open(os.path.join(REGISTRY_DIR, self.version, "metadata.json"), 'r') as f:
+                    self.metadata = json.load(f)
+            self.thresholds = {**DEFAULT_THRESHOLDS, **self.metadata.get("thresholds", {})}
+            self.EXPECTED_COLUMNS = self.metadata["features"]
+            self.encoder = FeatureEncoder(self.EXPECTED_COLUMNS)
             print(f"✅ Features loaded successfully ({len(self.EXPECTED_COLUMNS)} features)")
         except Exception as e:
             print(f"❌ Error loading features json: {e}")
             self.EXPECTED_COLUMNS = []
 
     def init_explainer(self):
-        """Inisialisasi SHAP TreeExplainer sekali saja biar cepat"""
-        if self.model:
+        """Inisialisasi explainer sekali saja biar cepat"""
+        if not self.model:
+            return
+
+        if self.explainer_backend == "shap":
             try:
+                import shap # Opsional: hanya di-import jika backend "shap" dipilih
                 self.explainer = shap.TreeExplainer(self.model)
                 print("✅ SHAP Explainer initialized")
+                return
             except Exception as e:
-                print(f"⚠️ Failed to init SHAP explainer: {e}")
+                print(f"⚠️ Failed to init SHAP explainer, fallback ke native: {e}")
+
+        try:
+            self.explainer = NativeTreeExplainer(self.model, self.iteration_range)
+            print("✅ Native XGBoost explainer initialized")
+        except Exception as e:
+            print(f"⚠️ Failed to init explainer: {e}")
+
+    def load(self, run=lambda name, fn, check: fn()):
+        """Model & features paralel, lalu explainer (butuh model). run() = pencatat durasi per komponen"""
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="ml-load") as pool:
+            loads = [
+                pool.submit(run, "model", self.load_model, lambda: self.model),
+                pool.submit(run, "features", self.load_features, lambda: self.encoder),
+            ]
+            for future in loads:
+                future.result()
+        run("explainer", self.init_explainer, lambda: self.explainer)
+        return self
+
+    def warm_up(self):
+        """Satu inference + explanation dummy: alokasi & cache XGBoost terjadi sebelum versi ini melayani request"""
+        X = np.zeros((1, len(self.EXPECTED_COLUMNS)))
+        self.model.inplace_predict(X, iteration_range=self.iteration_range)
+        if self.explainer:
+            self.explainer.shap_values(pd.DataFrame(X, columns=self.EXPECTED_COLUMNS))
+
+class MLService:
+    def __init__(self, explainer_backend: str = EXPLAINER_BACKEND, autoload: bool = True):
+        self.explainer_backend = explainer_backend
+        self.nthread = ML_NTHREAD
+        # Versi aktif. Diganti dengan SATU assignment (atomic); request yang sedang
+        # berjalan memegang referensi bundle lama sampai selesai.
+        self.active = ModelBundle(LEGACY_VERSION, explainer_backend)
+        self._load_lock = threading.Lock()
+        self._loaded = threading.Event()
+
+        # autoload=False: load ditunda ke load() (mis. di lifespan FastAPI)
+        if autoload:
+            self.load()
+
+    # Atribut versi aktif (kompatibel dengan pemakaian lama: ml_service.model, .encoder, ...)
+    model = property(lambda self: self.active.model)
+    explainer = property(lambda self: self.active.explainer)
+    encoder = property(lambda self: self.active.encoder)
+    EXPECTED_COLUMNS = property(lambda self: self.active.EXPECTED_COLUMNS)
+    metadata = property(lambda self: self.active.metadata)
+    model_version = property(lambda self: self.active.version)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def load(self):
+        """
+        Load versi aktif registry saat startup (durasi per komponen dicatat di startup).
+        Idempotent & thread-safe: pemanggil lain menunggu load yang sedang berjalan.
+        """
+        if self._loaded.is_set():
+            return
+        with self._load_lock:
+            if self._loaded.is_set():
+                return
+            startup.register("model", "features", "explainer")
+            try:
+                version = resolve_version()
+            except ValueError as e:
+                print(f"❌ {e}, fallback ke {LEGACY_VERSION}")
+                version = LEGACY_VERSION
+            self.active = ModelBundle(version, self.explainer_backend, self.nthread).load(startup.run)
+            self._loaded.set()
+        # Response yang di-cache selama loading (mis. insights) memakai metadata kosong
+        response_cache.invalidate()
+
+    def wait_loaded(self, timeout: float = ML_READY_TIMEOUT) -> bool:
+        return self._loaded.wait(timeout)
+
+    def reload(self, version: str = None, persist: bool = True) -> dict:
+        """
+        Hot reload tanpa downtime: load + warm-up versi baru di samping versi lama,
+        lalu tukar referensi aktif. Jika versi baru gagal, versi lama tetap dipakai (raise).
+        """
+        version = resolve_version(version)
+        started = time.perf_counter()
+        with self._load_lock:
+            bundle = ModelBundle(version, self.explainer_backend, self.nthread).load()
+            if not bundle.model or not bundle.encoder:
+                raise ValueError(f"Model version {version} failed to load")
+            bundle.warm_up()
+
+            previous = self.active.version
+            self.active = bundle
+            self._loaded.set()
+        if persist:
+            # Artefak lama juga ditulis ke ACTIVE: tanpa file ini restart akan memilih versi terbaru registry
+            set_active_version(version)
+
+        seconds = round(time.perf_counter() - started, 3)
+        print(f"🔄 Model swapped {previous} -> {version} in {seconds:.2f}s")
+        return {"previous": previous, "active": version, "seconds": seconds}
+
+    def export_booster(self, path: str = BOOSTER_PATH):
+        """Simpan booster ke format native XGBoost (.json / .ubj sesuai ekstensi)"""
+        self.model.save_model(path)
+        return path
+
+    # Semua method di bawah memakai SATU snapshot bundle (b = self.active) per panggilan,
+    # jadi hasil tetap konsisten walau versi aktif ditukar di tengah jalan.
 
     def preprocess_input(self, data: dict) -> pd.DataFrame:
-        # 1. Buat DataFrame
-        df = pd.DataFrame([data])
-        
-        # 2. Feature Engineering
-        if 'pdays' in df.columns:
-            df['pdays'] = pd.to_numeric(df['pdays'], errors='coerce').fillna(999)
-            df['pernah_dihubungi'] = df['pdays'].apply(lambda x: 0 if x == 999 else 1)
-            df = df.drop(columns=['pdays'])
-        
-        # 3. Encoding & Alignment
-        df_encoded = pd.get_dummies(df, drop_first=True)
-        final_df = pd.DataFrame(0, index=df.index, columns=self.EXPECTED_COLUMNS)
-        
-        for col in df_encoded.columns:
-            # Normalisasi nama kolom (titik ke underscore) untuk matching
-            col_fixed = col.replace('.', '_')
-            # Cek kedua kemungkinan (nama asli atau nama fixed)
-            if col in final_df.columns:
-                final_df[col] = df_encoded[col]
-            elif col_fixed in final_df.columns:
-                final_df[col_fixed] = df_encoded[col]
-                
-        return final_df
+        b = self.active
+        return pd.DataFrame(b.encoder.encode_records([data]), columns=b.EXPECTED_COLUMNS)
+
+    def preprocess_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Preprocessing vektor untuk banyak baris sekaligus (via FeatureEncoder)"""
+        b = self.active
+        return pd.DataFrame(b.encoder.encode_frame(df), columns=b.EXPECTED_COLUMNS, index=df.index)
+
+    @staticmethod
+    def label_for(probability: float, thresholds: dict = DEFAULT_THRESHOLDS) -> str:
+        if probability > thresholds["high"]:
+            return "High Potential"
+        return "Medium Potential" if probability > thresholds["medium"] else "Low Potential"
+
+    def predict_proba(self, X: np.ndarray, bundle: ModelBundle = None) -> np.ndarray:
+        """Inference langsung di array NumPy (inplace_predict, tanpa DMatrix/validasi sklearn)"""
+        b = bundle or self.active
+        return b.model.inplace_predict(X, iteration_range=b.iteration_range).astype(float)
 
     def predict(self, data: dict):
-        if not self.model: return {"error": "Model not loaded"}
+        b = self.active
+        if not b.model: return {"error": "Model not loaded"}
         
         try:
-            processed_data = self.preprocess_input(data)
-            probability = self.model.predict_proba(processed_data)[0][1]
-            label = "High Potential" if probability > 0.7 else "Medium Potential" if probability > 0.3 else "Low Potential"
+            probability = self.predict_proba(b.encoder.encode_records([data]), b)[0]
+            label = self.label_for(probability, b.thresholds)
             
-            return {"score": float(probability), "label": label}
+            return {"score": float(probability), "label": label, "model_version": b.version}
         except Exception as e:
             return {"error": str(e)}
 
+    def predict_many(self, records: list) -> list:
+        """Versi batch dari predict() untuk list of dict (dipakai micro-batcher)"""
+        b = self.active
+        if not b.model: return [{"error": "Model not loaded"}] * len(records)
+
+        probabilities = self.predict_proba(b.encoder.encode_records(records), b)
+        return [
+            {"score": float(p), "label": self.label_for(p, b.thresholds), "model_version": b.version}
+            for p in probabilities
+        ]
+
+    def explain_top_features(self, X: np.ndarray, top_k: int = 5, threshold: float = 0.05, bundle: ModelBundle = None):
+        """
+        SHAP untuk banyak baris dengan SATU panggilan shap_values(matrix).
+        Return per baris: list (index fitur, impact) yang |impact| > threshold,
+        urut dari dampak terbesar, maksimal top_k.
+        """
+        b = bundle or self.active
+        shap_values = np.asarray(b.explainer.shap_values(pd.DataFrame(X, columns=b.EXPECTED_COLUMNS)))
+
+        results = []
+        for values in shap_values.reshape(len(X), -1):
+            idx = np.flatnonzero(np.abs(values) > threshold) # Ambil hanya yang berdampak signifikan
+            idx = idx[np.argsort(-np.abs(values[idx]), kind="stable")][:top_k]
+            results.append([(int(i), float(values[i])) for i in idx])
+        return results
+
+    def format_explanation(self, top_features, feature_row: np.ndarray, bundle: ModelBundle = None):
+        """Ubah pasangan (index fitur, impact) jadi payload explanation + Rekomendasi Percakapan"""
+        columns = (bundle or self.active).EXPECTED_COLUMNS
+        explanation = [
+            {"feature": columns[i], "impact": impact, "value": float(feature_row[i])}
+            for i, impact in top_features
+        ]
+
+        # Generate Simple Insight / Script (Next Best Conversation)
+        top_feature = explanation[0]['feature'] if explanation else ""
+        recommendation = "Gali kebutuhan nasabah secara umum."
+        
+        if "nr_employed" in top_feature or "euribor" in top_feature:
+            recommendation = "Buka percakapan dengan membahas kondisi ekonomi yang sedang stabil/bagus untuk investasi."
+        elif "pernah_dihubungi" in top_feature:
+            recommendation = "Sebutkan bahwa kita pernah menghubungi beliau sebelumnya dan ada penawaran baru."
+        elif "age" in top_feature:
+            recommendation = "Sesuaikan nada bicara dengan usia nasabah (pensiunan vs pekerja aktif)."
+        
+        return {
+            "shap_values": explanation, 
+            "recommendation": recommendation
+        }
+
+    def explain_many(self, records: list) -> list:
+        """Versi batch dari explain_prediction(): satu kali shap_values untuk semua record"""
+        b = self.active
+        if not b.explainer:
+            return [None] * len(records)
+
+        X = b.encoder.encode_records(records)
+        return [
+            self.format_explanation(top_features, row, b)
+            for top_features, row in zip(self.explain_top_features(X, bundle=b), X)
+        ]
+
     def explain_prediction(self, data: dict):
         """
         Menghasilkan penjelasan SHAP values dan Rekomendasi Percakapan
         """
-        if not self.explainer:
+        b = self.active
+        if not b.explainer:
             return None
 
         try:
-            processed_data = self.preprocess_input(data)
-            shap_values = self.explainer.shap_values(processed_data)
-            
-            # XGBoost binary classification return array of shape (1, n_features)
-            # Kita ambil index 0
-            values = shap_values[0]
-            
-            # Buat list fitur dan dampaknya
-            explanation = []
-            for i, col_name in enumerate(self.EXPECTED_COLUMNS):
-                impact = float(values[i])
-                if abs(impact) > 0.05: # Ambil hanya yang berdampak signifikan
-                    explanation.append({
-                        "feature": col_name,
-                        "impact": impact,
-                        "value": float(processed_data.iloc[0, i])
-                    })
-            
-            # Sort by absolute impact (terbesar ke terkecil)
-            explanation.sort(key=lambda x: abs(x['impact']), reverse=True)
-            
-            # Generate Simple Insight / Script (Next Best Conversation)
-            top_feature = explanation[0]['feature'] if explanation else ""
-            recommendation = "Gali kebutuhan nasabah secara umum."
-            
-            if "nr_employed" in top_feature or "euribor" in top_feature:
-                recommendation = "Buka percakapan dengan membahas kondisi ekonomi yang sedang stabil/bagus untuk investasi."
-            elif "pernah_dihubungi" in top_feature:
-                recommendation = "Sebutkan bahwa kita pernah menghubungi beliau sebelumnya dan ada penawaran baru."
-            elif "age" in top_feature:
-                recommendation = "Sesuaikan nada bicara dengan usia nasabah (pensiunan vs pekerja aktif)."
-            
-            return {
-                "shap_values": explanation[:5], 
-                "recommendation": recommendation
-            }
-            
+            X = b.encoder.encode_records([data])
+            return self.format_explanation(self.explain_top_features(X, bundle=b)[0], X[0], b)
         except Exception as e:
             print(f"Explain Error: {e}")
             return None
 
-ml_service = MLService()
\ No newline at end of file
+# Tidak di-load saat import: server memuatnya di background (lifespan),
+# script & proses worker memanggil ml_service.load() sendiri.
+ml_service = MLService(autoload=False)
\ No newline at end of file
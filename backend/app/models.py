@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -70,7 +70,117 @@ class Lead(Base):
     # Prediction Results
     prediction_score = Column(Float, nullable=True)
     prediction_label = Column(String, nullable=True)
+    model_version = Column(String, nullable=True) # Versi model registry yang memberi skor
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+    # Index untuk kombinasi filter/sort di crud.get_leads (id = tie-breaker keyset pagination),
+    # group by dashboard (rebuild counter) dan sort aktivitas di profile
+    __table_args__ = (
+        Index("ix_leads_job_id", "job", "id"),
+        Index("ix_leads_status_id", "status", "id"),
+        Index("ix_leads_age_id", "age", "id"),
+        Index("ix_leads_score_id", "prediction_score", "id"),
+        Index("ix_leads_job_score_id", "job", "prediction_score", "id"),
+        Index("ix_leads_prediction_label", "prediction_label"),
+        Index("ix_leads_created_at", "created_at"),
+        Index("ix_leads_updated_at", "updated_at"),
+    )
+
+
+# sort_by=score_high memakai "score DESC NULLS LAST, id DESC". Di Postgres urutan ini
+# tidak bisa didapat dari scan mundur ix_leads_score_id, jadi butuh index sendiri.
+# SQLite tidak mendukung NULLS LAST di CREATE INDEX (dan tidak membutuhkannya).
+Index(
+    "ix_leads_score_desc_id",
+    Lead.prediction_score.desc().nulls_last(),
+    Lead.id.desc(),
+).ddl_if(dialect="postgresql")
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String)
+    status = Column(String, default="queued") # queued -> running -> completed / failed
+
+    # Progress counter (di-update tiap batch oleh worker)
+    rows_parsed = Column(Integer, default=0)
+    rows_scored = Column(Integer, default=0)
+    rows_inserted = Column(Integer, default=0)
+    rows_failed = Column(Integer, default=0)
+    elapsed_seconds = Column(Float, default=0.0)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed_seconds:
+            return 0.0
+        return round((self.rows_inserted or 0) / self.elapsed_seconds, 1)
+
+
+class RescoreJob(Base):
+    """
+    Re-scoring lead yang sudah ada dengan versi model tertentu.
+    Berjalan per rentang id; last_lead_id = checkpoint, jadi job bisa dilanjutkan.
+    """
+    __tablename__ = "rescore_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    model_version = Column(String, nullable=False)
+    status = Column(String, default="queued") # queued -> running -> completed / failed
+
+    # Rentang id yang diproses (dibekukan saat job dibuat; lead baru sudah di-score model aktif)
+    last_lead_id = Column(Integer, default=0)
+    max_lead_id = Column(Integer, default=0)
+    total_leads = Column(Integer, default=0)
+    rows_rescored = Column(Integer, default=0)
+    elapsed_seconds = Column(Float, default=0.0)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def progress(self):
+        if not self.total_leads:
+            return 100.0 if self.status == "completed" else 0.0
+        return round(100.0 * (self.rows_rescored or 0) / self.total_leads, 1)
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed_seconds:
+            return 0.0
+        return round((self.rows_rescored or 0) / self.elapsed_seconds, 1)
+
+
+class LeadStat(Base):
+    """
+    Counter dashboard yang dijaga secara incremental (materialized counters).
+    Satu baris = jumlah lead pada satu bucket dari satu dimensi,
+    mis. ("age_dist", "26-35") atau ("label", "High Potential").
+    """
+    __tablename__ = "lead_stats"
+
+    dimension = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True) # NULL disimpan sebagai "" (primary key tidak boleh NULL)
+    lead_count = Column(Integer, default=0, nullable=False)
+
+
+class LeadExplanation(Base):
+    """
+    Cache SHAP per lead. Fitur lead tidak berubah setelah ingest, jadi explanation
+    cukup dihitung sekali per versi model dan disimpan ringkas sebagai
+    JSON [[index_fitur, impact], ...] (top-k).
+    """
+    __tablename__ = "lead_explanations"
+
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), primary_key=True)
+    model_version = Column(String, nullable=False)
+    top_features = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
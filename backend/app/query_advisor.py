@@ -0,0 +1,74 @@
+"""
+Diagnostik index: jalankan EXPLAIN untuk setiap query crud di engine yang aktif
+dan tandai query yang masih melakukan sequential scan pada tabel besar.
+"""
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import models, crud
+
+# Query ini memang harus membaca seluruh tabel (rekonsiliasi counter)
+FULL_SCAN_EXPECTED = {"rebuild_lead_stats"}
+
+
+def _crud_queries(db: Session):
+    """Query representatif untuk setiap pola akses di crud"""
+    leads = db.query(models.Lead)
+    page = lambda query, sort_by: crud._sort_leads(query, sort_by).limit(100)
+    return {
+        "get_leads newest": page(leads, "newest"),
+        "get_leads oldest": page(leads, "oldest"),
+        "get_leads score_high": page(leads, "score_high"),
+        "get_leads score_low": page(leads, "score_low"),
+        "get_leads job": page(crud._filter_leads(leads, job="admin."), "newest"),
+        "get_leads job + score_high": page(crud._filter_leads(leads, job="admin."), "score_high"),
+        "get_leads status": page(crud._filter_leads(leads, status="New"), "newest"),
+        "get_leads age range": page(crud._filter_leads(leads, min_age=30, max_age=40), "newest"),
+        "get_leads min_score": page(crud._filter_leads(leads, min_score=0.7), "score_high"),
+        "get_leads count job": crud._filter_leads(db.query(models.Lead.id), job="admin."),
+        "get_lead_by_id": leads.filter(models.Lead.id == 1),
+        "get_user_profile first lead": leads.order_by(models.Lead.created_at.asc()).limit(1),
+        "get_user_profile recent": leads.order_by(models.Lead.updated_at.desc()).limit(5),
+        "rebuild_lead_stats": None,
+    }
+
+
+def _compile(db: Session, name: str, query) -> str:
+    if name == "rebuild_lead_stats":
+        stmt = crud._stat_counts_statement(db)
+    else:
+        stmt = query.statement
+    return str(stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _explain(db: Session, sql: str):
+    """Return (baris plan, apakah ada sequential scan di tabel leads)"""
+    if db.get_bind().dialect.name == "postgresql":
+        plan = [row[0] for row in db.execute(text("EXPLAIN " + sql))]
+        seq_scan = any(re.search(r"Seq Scan on leads\b", line) for line in plan)
+    else:
+        # SQLite: "SCAN leads" tanpa "USING ... INDEX" = full table scan
+        plan = [row[-1] for row in db.execute(text("EXPLAIN QUERY PLAN " + sql))]
+        seq_scan = any(re.match(r"SCAN leads\b", line) and "INDEX" not in line for line in plan)
+        # Scan berurutan rowid (= primary key) dengan LIMIT tanpa sort tambahan berhenti lebih awal
+        if seq_scan and " LIMIT " in sql and not any("TEMP B-TREE FOR ORDER BY" in line for line in plan):
+            seq_scan = False
+    return plan, seq_scan
+
+
+def explain_crud_queries(db: Session):
+    """Return list dict {name, sql, plan, seq_scan, expected}"""
+    report = []
+    for name, query in _crud_queries(db).items():
+        sql = _compile(db, name, query)
+        plan, seq_scan = _explain(db, sql)
+        report.append({
+            "name": name,
+            "sql": sql,
+            "plan": plan,
+            "seq_scan": seq_scan,
+            "expected": name in FULL_SCAN_EXPECTED,
+        })
+    return report
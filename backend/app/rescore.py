@@ -0,0 +1,124 @@
+"""
+Re-scoring lead yang sudah ada setelah model diganti (registry / hot reload).
+
+Lead dibaca per rentang id (keyset), di-score vektor per batch dengan versi model
+job, lalu ditulis balik dengan UPDATE executemany. Checkpoint (last_lead_id)
+di-commit dalam transaksi yang sama dengan UPDATE-nya, jadi job yang terhenti
+(crash, restart, deploy) dilanjutkan dari batch terakhir yang sukses.
+"""
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from . import models, crud, executors
+from .database import SessionLocal
+from .ml_service import ml_service
+
+# Batch kecil = transaksi & lock pendek di tabel leads
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", 1000))
+# Throttle agar traffic OLTP tidak kelaparan: jeda antar batch + batas baris/detik (0 = tanpa batas)
+RESCORE_PAUSE_SECONDS = float(os.getenv("RESCORE_PAUSE_SECONDS", 0.05))
+RESCORE_MAX_ROWS_PER_SECOND = float(os.getenv("RESCORE_MAX_ROWS_PER_SECOND", 0))
+
+# Satu job pada satu waktu: re-scoring adalah pekerjaan latar, bukan prioritas
+_job_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rescore")
+
+
+def submit_rescore_job(db: Session) -> models.RescoreJob:
+    """Buat job untuk versi model aktif. Jika job untuk versi ini masih berjalan, kembalikan job itu."""
+    ml_service.load()
+    for job in crud.get_unfinished_rescore_jobs(db):
+        if job.model_version == ml_service.model_version:
+            return job
+
+    job = crud.create_rescore_job(db, ml_service.model_version)
+    _job_pool.submit(run_rescore_job, job.id)
+    return job
+
+
+def resume_rescore_job(db: Session, job_id: int):
+    """Antrikan ulang job yang gagal/terhenti; lanjut dari checkpoint"""
+    job = crud.get_rescore_job(db, job_id)
+    if job is None or job.status == "completed":
+        return job
+    job.status, job.error, job.finished_at = "queued", None, None
+    db.commit()
+    _job_pool.submit(run_rescore_job, job.id)
+    return job
+
+
+def resume_unfinished_jobs():
+    """Dipanggil saat startup: job queued/running dari proses sebelumnya dilanjutkan"""
+    db = SessionLocal()
+    try:
+        job_ids = [job.id for job in crud.get_unfinished_rescore_jobs(db)]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        _job_pool.submit(run_rescore_job, job_id)
+    return job_ids
+
+
+def run_rescore_job(job_id: int, batch_size: int = RESCORE_BATCH_SIZE,
+                    pause: float = RESCORE_PAUSE_SECONDS, max_rows_per_second: float = RESCORE_MAX_ROWS_PER_SECOND):
+    """Dijalankan di worker thread (atau langsung dari CLI): baca -> score -> UPDATE per batch"""
+    ml_service.load()
+    db = SessionLocal()
+    started = time.perf_counter()
+    job = None
+    try:
+        job = crud.get_rescore_job(db, job_id)
+        if job is None or job.status == "completed":
+            job = None
+            return
+        # elapsed_seconds job yang dilanjutkan tetap akumulatif
+        previous_elapsed = job.elapsed_seconds or 0.0
+        job.status = "running"
+        db.commit()
+
+        rescored_this_run = 0
+        while True:
+            bundle = ml_service.active
+            if bundle.version != job.model_version:
+                raise RuntimeError(f"Active model changed to {bundle.version}; start a new rescore job")
+
+            leads = crud.get_leads_for_rescore(db, job.last_lead_id, job.max_lead_id, batch_size)
+            if not leads:
+                break
+
+            X = bundle.encoder.encode_frame(pd.DataFrame(leads))
+            predictions = executors.predictions_from_scores(ml_service.predict_proba(X, bundle), len(leads), bundle)
+
+            # Checkpoint ikut transaksi UPDATE (commit di bulk_update_scores)
+            job.last_lead_id = leads[-1]["id"]
+            job.rows_rescored = (job.rows_rescored or 0) + len(leads)
+            job.elapsed_seconds = previous_elapsed + time.perf_counter() - started
+            crud.bulk_update_scores(db, leads, predictions)
+            rescored_this_run += len(leads)
+
+            # Throttle: jeda minimal, ditambah tunggu jika melebihi batas baris/detik
+            wait = pause
+            if max_rows_per_second > 0:
+                wait = max(wait, rescored_this_run / max_rows_per_second - (time.perf_counter() - started))
+            if wait > 0:
+                time.sleep(wait)
+
+        job.elapsed_seconds = previous_elapsed + time.perf_counter() - started
+        job.status = "completed"
+    except Exception as e:
+        traceback.print_exc()
+        db.rollback()
+        job = crud.get_rescore_job(db, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(e)
+    finally:
+        if job is not None:
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        db.close()
@@ -39,6 +39,7 @@ class LeadResponse(LeadBase):
     id: int
     prediction_score: Optional[float] = None
     prediction_label: Optional[str] = None
+    model_version: Optional[str] = None
     created_at: datetime
     
     explanation: Optional[Dict[str, Any]] = None 
@@ -46,6 +47,23 @@ class LeadResponse(LeadBase):
     class Config:
         from_attributes = True # Dulu orm_mode = True
 
+# Schema ringan untuk item daftar leads (/api/v1/leads). Semua kolom opsional karena
+# ?fields= bisa memilih sebagian kolom; tanpa explanation (ada di detail lead).
+class LeadListItem(LeadBase):
+    id: int
+    balance: Optional[float] = None
+    status: Optional[str] = None
+    prediction_score: Optional[float] = None
+    prediction_label: Optional[str] = None
+    model_version: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class LeadListResponse(BaseModel):
+    total_found: Optional[int] = None
+    data: List[LeadListItem]
+    next_cursor: Optional[str] = None
+
 # Schema untuk Dashboard Stats
 class DashboardStats(BaseModel):
     total_leads: int
@@ -58,4 +76,45 @@ class DashboardStats(BaseModel):
     marital_dist: List[Dict[str, Any]]
     edu_dist: List[Dict[str, Any]]
     job_dist: List[Dict[str, Any]]
-    econ_dist: List[Dict[str, Any]]
\ No newline at end of file
+    econ_dist: List[Dict[str, Any]]
+
+# Schema untuk status Background Ingest Job
+class IngestJobResponse(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    status: str
+    rows_parsed: int = 0
+    rows_scored: int = 0
+    rows_inserted: int = 0
+    rows_failed: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Schema untuk status Rescore Job
+class RescoreJobResponse(BaseModel):
+    id: int
+    model_version: str
+    status: str
+    last_lead_id: int = 0
+    max_lead_id: int = 0
+    total_leads: int = 0
+    rows_rescored: int = 0
+    progress: float = 0.0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Schema untuk hot reload model
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = None
@@ -0,0 +1,69 @@
+"""
+Serializer JSON cepat untuk response besar (mis. daftar leads 100-1000 baris).
+
+Pakai orjson jika terpasang (opsional), fallback ke json standard library dengan
+output yang sama (compact, UTF-8, datetime ISO 8601, NaN/Infinity -> null).
+Konten harus sudah berupa tipe dasar (dict/list/str/angka/datetime) -- tidak
+lewat jsonable_encoder.
+"""
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson # Opsional: pip install orjson
+except ImportError:
+    orjson = None
+
+
+def orjson_available() -> bool:
+    return orjson is not None
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _finite(value):
+    """Samakan dengan orjson: float non-finite (NaN, Infinity) jadi null"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+
+def _stdlib_dumps(content) -> bytes:
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        # OPT_SERIALIZE_NUMPY: skor dari model bisa berupa numpy float
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        return _stdlib_dumps(content)
+    except ValueError:
+        # Ada NaN/Infinity: bersihkan dulu (jalur lambat, jarang terjadi)
+        return _stdlib_dumps(_finite(content))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse tanpa jsonable_encoder: konten langsung di-dump (orjson jika ada)"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,52 @@
+"""
+Status & durasi startup per komponen (database, model, features, explainer, ...).
+Dipakai lifespan FastAPI untuk load di background dan oleh /api/v1/ready.
+"""
+import threading
+import time
+
+
+class StartupTracker:
+    def __init__(self):
+        self.components = {}
+        self._lock = threading.Lock()
+
+    def register(self, *names: str):
+        with self._lock:
+            for name in names:
+                self.components.setdefault(name, {"status": "pending", "seconds": None, "error": None})
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self.components.setdefault(name, {"status": "pending", "seconds": None, "error": None}).update(fields)
+
+    def run(self, name: str, fn, check=None):
+        """
+        Jalankan fn, catat durasinya. Komponen "ready" jika fn tidak raise dan
+        check() (opsional) bernilai truthy; selain itu "failed".
+        """
+        self._set(name, status="loading")
+        started = time.perf_counter()
+        error = None
+        try:
+            fn()
+            ok = bool(check()) if check else True
+        except Exception as e:
+            ok, error = False, str(e)
+        seconds = round(time.perf_counter() - started, 3)
+
+        self._set(name, status="ready" if ok else "failed", seconds=seconds, error=error)
+        print(f"{'⏱️' if ok else '❌'} Startup {name}: {'ready' if ok else 'failed'} in {seconds:.2f}s")
+        return ok
+
+    def is_ready(self, *names: str) -> bool:
+        with self._lock:
+            names = names or tuple(self.components)
+            return all(self.components.get(n, {}).get("status") == "ready" for n in names)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: dict(info) for name, info in self.components.items()}
+
+
+startup = StartupTracker()
@@ -1,5 +1,7 @@
 from app.ml_service import ml_service
 
+ml_service.load()
+
 # Contoh data dummy (satu nasabah)
 dummy_data = {
     "age": 30,
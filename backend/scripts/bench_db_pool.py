@@ -0,0 +1,188 @@
+"""
+Load test connection pool: throughput & latency endpoint yang memakai DB untuk
+beberapa setting pool (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_PGBOUNCER, ...).
+
+Server yang sudah berjalan:
+    python scripts/bench_db_pool.py --base-url http://127.0.0.1:8000 --concurrency 32 --duration 20
+
+Atau biarkan script menjalankan uvicorn sekali per setting (env lain, mis. DATABASE_URL, diwarisi):
+    python scripts/bench_db_pool.py --spawn "DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0" \\
+        "DB_POOL_SIZE=20 DB_MAX_OVERFLOW=10" "DB_POOL_SIZE=0"
+
+Selama load test, /api/v1/db/pool-stats di-sampling untuk melihat puncak koneksi
+yang dipakai, overflow, timeout dan rata-rata lama tunggu checkout. Endpoint itu butuh
+login: user --username/--password dipakai (dan didaftarkan jika belum ada).
+Hanya memakai standard library.
+"""
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+DEFAULT_PATHS = ["/api/v1/leads?limit=20&count=none", "/api/v1/health-check", "/api/v1/leads?limit=20&job=admin."]
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_json(url: str, timeout: float = 30, token: str = None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    form = urllib.parse.urlencode({"username": username, "password": password}).encode()
+    try:
+        with urllib.request.urlopen(base_url + "/api/v1/login", data=form, timeout=30) as response:
+            return json.loads(response.read())["access_token"]
+    except urllib.error.HTTPError as e:
+        if e.code != 401:
+            raise
+    # User belum ada -> daftarkan sekali lalu login ulang
+    body = json.dumps({"username": username, "password": password}).encode()
+    request = urllib.request.Request(
+        base_url + "/api/v1/register", data=body, headers={"Content-Type": "application/json"}
+    )
+    urllib.request.urlopen(request, timeout=30).read()
+    return login(base_url, username, password)
+
+
+def worker(base_url: str, paths: list, offset: int, deadline: float, latencies: list, errors: list):
+    i = offset
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + paths[i % len(paths)], timeout=60) as response:
+                response.read()
+            latencies.append(time.perf_counter() - started)
+        except (urllib.error.URLError, OSError) as e:
+            errors.append(str(e))
+        i += 1
+
+
+def sample_pool(base_url: str, token: str, stop: threading.Event, peak: dict):
+    while not stop.is_set():
+        try:
+            stats = get_json(base_url + "/api/v1/db/pool-stats", timeout=5, token=token)
+            for key in ("checked_out", "overflow"):
+                peak[key] = max(peak.get(key, 0), stats.get(key, 0))
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def run_load(base_url: str, token: str, paths: list, concurrency: int, duration: float) -> dict:
+    # Pemanasan singkat agar pool terisi sebelum diukur
+    for path in paths:
+        get_json(base_url + path)
+    before = get_json(base_url + "/api/v1/db/pool-stats", token=token)
+
+    latencies, errors, peak = [], [], {}
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_pool, args=(base_url, token, stop, peak))
+    sampler.start()
+
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, paths, n, deadline, latencies, errors))
+        for n in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+
+    after = get_json(base_url + "/api/v1/db/pool-stats", token=token)
+    wait_before = before.get("checkout_wait_seconds", {})
+    wait_after = after.get("checkout_wait_seconds", {})
+    checkouts = wait_after.get("count", 0) - wait_before.get("count", 0)
+    wait_sum = wait_after.get("sum", 0.0) - wait_before.get("sum", 0.0)
+
+    ms = [v * 1000 for v in latencies] or [0.0]
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(ms, 50), "p95": percentile(ms, 95), "p99": percentile(ms, 99),
+        "mean": statistics.mean(ms),
+        "pool": after.get("pool_class"),
+        "peak_checked_out": peak.get("checked_out", "-"),
+        "peak_overflow": peak.get("overflow", "-"),
+        "timeouts": after.get("timeouts", 0) - before.get("timeouts", 0),
+        "avg_wait_ms": wait_sum / checkouts * 1000 if checkouts else 0.0,
+    }
+
+
+def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Server berhenti (exit code {process.returncode})")
+        try:
+            get_json(base_url + "/api/v1/health-check", timeout=2)
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise SystemExit("❌ Server tidak merespons")
+
+
+def print_result(label: str, r: dict):
+    print(
+        f"{label:<40} {r['rps']:8.1f} req/s  p50={r['p50']:6.1f}ms p95={r['p95']:7.1f}ms p99={r['p99']:7.1f}ms  "
+        f"err={r['errors']:<4} pool={r['pool']} peak_out={r['peak_checked_out']} peak_overflow={r['peak_overflow']} "
+        f"timeouts={r['timeouts']} avg_wait={r['avg_wait_ms']:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15, help="Lama load test per setting (detik)")
+    parser.add_argument("--path", action="append", help="Endpoint yang di-hit bergiliran (bisa diulang)")
+    parser.add_argument("--spawn", nargs="+", metavar="ENV", help='Setting per run, mis. "DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0"')
+    parser.add_argument("--port", type=int, default=8765, help="Port uvicorn untuk --spawn")
+    parser.add_argument("--username", default="bench", help="User untuk /api/v1/db/pool-stats")
+    parser.add_argument("--password", default="bench-password")
+    args = parser.parse_args()
+    paths = args.path or DEFAULT_PATHS
+
+    if not args.spawn:
+        token = login(args.base_url, args.username, args.password)
+        print_result(args.base_url, run_load(args.base_url, token, paths, args.concurrency, args.duration))
+        return
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    for setting in args.spawn:
+        env = {**os.environ, **dict(item.split("=", 1) for item in shlex.split(setting))}
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(base_url, process)
+            token = login(base_url, args.username, args.password)
+            print_result(setting, run_load(base_url, token, paths, args.concurrency, args.duration))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
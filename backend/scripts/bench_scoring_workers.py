@@ -0,0 +1,75 @@
+"""
+Benchmark scaling scoring upload terhadap jumlah worker (SCORING_PROCESSES).
+
+Tanpa server & tanpa DB: CSV sintetis (format dataset bank UCI) di-parse per batch
+di proses ini seperti ingest, lalu encoding + predict dibagi ke process pool
+lewat executors.score_batches. Untuk tiap jumlah worker dicetak rows/s untuk
+"score" (batch sudah di-parse) dan "parse+score" (termasuk parsing CSV), plus
+CPU proses induk per baris: bagian serial yang membatasi scaling (hukum Amdahl).
+0 = tanpa process pool (encoding + predict di proses ini).
+
+    python scripts/bench_scoring_workers.py --rows 200000 --workers 0 1 2 4 8
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(executors, batches):
+    """Return (rows/s, CPU proses induk per baris dalam mikrodetik)"""
+    started, cpu_started = time.perf_counter(), time.process_time()
+    rows = 0
+    for df, predictions in executors.score_batches(batches):
+        if isinstance(predictions, Exception):
+            raise predictions
+        rows += len(predictions)
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    return rows / elapsed, cpu / rows * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8])
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+    from bench_upload_latency import make_csv
+
+    from app import executors
+    from app.ingest import iter_csv_batches
+    from app.ml_service import ml_service
+
+    ml_service.load()
+    payload = make_csv(args.rows)
+    frames = list(iter_csv_batches(io.BytesIO(payload), args.batch_size))
+    print(f"{args.rows} rows, batch {args.batch_size}, {os.cpu_count()} CPU, model {ml_service.model_version}")
+
+    baseline = None
+    for n in args.workers:
+        executors.shutdown()
+        executors.SCORING_PROCESSES = n
+        executors.prewarm()
+        run(executors, frames[:2]) # Pemanasan (model di worker, cache pandas)
+
+        score, score_cpu = run(executors, iter(frames))
+        parse_score, parse_cpu = run(executors, iter_csv_batches(io.BytesIO(payload), args.batch_size))
+        if n == 1:
+            baseline = score
+        scaling = f"  x{score / baseline:.2f} vs 1 worker" if baseline and n > 1 else ""
+        print(
+            f"workers={n:<3} score {score:>10,.0f} rows/s (induk {score_cpu:5.2f} us/row)   "
+            f"parse+score {parse_score:>10,.0f} rows/s (induk {parse_cpu:5.2f} us/row){scaling}"
+        )
+
+    executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark serialisasi /api/v1/leads per halaman: sebelum vs sesudah.
+
+- before : query objek ORM Lead + jsonable_encoder + JSONResponse (cara lama)
+- after  : query kolom -> dict + FastJSONResponse (orjson jika terpasang)
+- list   : sama dengan after, tapi hanya kolom tabel leads (?fields=list)
+
+Memakai database SQLite sementara yang diisi lead sintetis, jadi tidak menyentuh DB asli:
+    python scripts/bench_serialization.py --rows 5000 --page-sizes 100 500 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(db, models, rows: int):
+    rnd = random.Random(42)
+    jobs = ["admin.", "blue-collar", "technician", "services", "management", "retired", "student"]
+    db.execute(models.Lead.__table__.insert(), [
+        {
+            "status": rnd.choice(["New", "Contacted", "Converted"]), "age": rnd.randint(18, 90),
+            "job": rnd.choice(jobs), "marital": rnd.choice(["married", "single", "divorced"]),
+            "education": "university.degree", "default": "no", "housing": rnd.choice(["yes", "no"]),
+            "loan": "no", "contact": "cellular", "month": "may", "day_of_week": "mon",
+            "campaign": rnd.randint(1, 6), "pdays": 999, "previous": rnd.randint(0, 2), "poutcome": "nonexistent",
+            "emp_var_rate": 1.1, "cons_price_idx": 93.994, "cons_conf_idx": -36.4,
+            "euribor3m": round(rnd.random() * 5, 3), "nr_employed": 5191.0, "balance": 0.0,
+            "prediction_score": rnd.random(), "prediction_label": "Medium Potential", "model_version": "bench",
+        }
+        for _ in range(rows)
+    ])
+    db.commit()
+
+
+def measure(fn, repeat: int):
+    """Median (ms) query & serialisasi, plus ukuran body"""
+    query_ms, serialize_ms = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = fn.query()
+        queried = time.perf_counter()
+        body = fn.render(payload)
+        query_ms.append((queried - started) * 1000)
+        serialize_ms.append((time.perf_counter() - queried) * 1000)
+    return statistics.median(query_ms), statistics.median(serialize_ms), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_serialization_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    sys.path.insert(0, BACKEND_DIR)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from app import crud, models
+    from app.database import SessionLocal, engine
+    from app.serialization import FastJSONResponse, orjson_available
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db, models, args.rows)
+    print(f"{args.rows} leads, orjson={'yes' if orjson_available() else 'no (json fallback)'}")
+
+    class Before:
+        def __init__(self, limit):
+            self.limit = limit
+
+        def query(self):
+            db.expunge_all() # Objek ORM dibuat ulang tiap request, seperti di endpoint
+            return db.query(models.Lead).order_by(models.Lead.id.desc()).limit(self.limit).all()
+
+        def render(self, data):
+            content = {"total_found": None, "data": data, "next_cursor": None}
+            return JSONResponse(jsonable_encoder(content)).body
+
+    class After:
+        def __init__(self, limit, fields=None):
+            self.limit, self.fields = limit, crud.parse_lead_fields(fields)
+
+        def query(self):
+            return crud.get_leads(db, limit=self.limit, count="none", fields=self.fields)
+
+        def render(self, result):
+            _, data, next_cursor = result
+            return FastJSONResponse({"total_found": None, "data": data, "next_cursor": next_cursor}).body
+
+    print(f"{'page':>6} {'variant':<8} {'query ms':>9} {'serialize ms':>13} {'total ms':>9} {'KB':>8}")
+    for limit in args.page_sizes:
+        results = {}
+        for name, fn in (("before", Before(limit)), ("after", After(limit)), ("list", After(limit, "list"))):
+            results[name] = measure(fn, args.repeat)
+            query_ms, serialize_ms, size = results[name]
+            print(f"{limit:>6} {name:<8} {query_ms:>9.2f} {serialize_ms:>13.2f} {query_ms + serialize_ms:>9.2f} {size / 1024:>8.1f}")
+        speedup = results["before"][1] / max(results["after"][1], 1e-9)
+        print(f"{'':>6} serialize speedup (before/after): {speedup:.1f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
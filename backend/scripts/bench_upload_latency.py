@@ -0,0 +1,116 @@
+"""
+Benchmark: throughput upload CSV + latency endpoint lain selama upload berjalan.
+
+Jalankan server dulu (mis. `uvicorn app.main:app --port 8000`), lalu:
+    python scripts/bench_upload_latency.py --rows 40000 --base-url http://127.0.0.1:8000
+
+Script membuat CSV sintetis (format dataset bank UCI), mengunggahnya ke
+/api/v1/upload-csv, dan selama upload berlangsung mem-ping /api/v1/health-check
+untuk mengukur p50/p95/p99 latency. Hanya memakai standard library.
+"""
+import argparse
+import io
+import random
+import statistics
+import threading
+import time
+import urllib.request
+import uuid
+
+HEADER = (
+    "age;job;marital;education;default;housing;loan;contact;month;day_of_week;campaign;"
+    "pdays;previous;poutcome;emp.var.rate;cons.price.idx;cons.conf.idx;euribor3m;nr.employed"
+)
+CHOICES = {
+    "job": ["admin.", "blue-collar", "technician", "services", "management", "retired", "student"],
+    "marital": ["married", "single", "divorced"],
+    "education": ["basic.4y", "basic.9y", "high.school", "university.degree", "professional.course"],
+    "month": ["may", "jun", "jul", "aug", "nov"],
+    "day_of_week": ["mon", "tue", "wed", "thu", "fri"],
+    "poutcome": ["nonexistent", "failure", "success"],
+}
+
+
+def make_csv(rows: int) -> bytes:
+    rnd = random.Random(42)
+    out = io.StringIO()
+    out.write(HEADER + "\n")
+    for _ in range(rows):
+        out.write(";".join(map(str, [
+            rnd.randint(18, 90), rnd.choice(CHOICES["job"]), rnd.choice(CHOICES["marital"]),
+            rnd.choice(CHOICES["education"]), "no", rnd.choice(["yes", "no"]), rnd.choice(["yes", "no"]),
+            rnd.choice(["cellular", "telephone"]), rnd.choice(CHOICES["month"]), rnd.choice(CHOICES["day_of_week"]),
+            rnd.randint(1, 6), rnd.choice([999, 999, 3, 6]), rnd.randint(0, 2), rnd.choice(CHOICES["poutcome"]),
+            rnd.choice([-1.8, 1.1, 1.4]), rnd.choice([92.893, 93.994]), rnd.choice([-46.2, -36.4]),
+            round(rnd.random() * 5, 3), rnd.choice([5099.1, 5191.0]),
+        ])) + "\n")
+    return out.getvalue().encode()
+
+
+def upload(base_url: str, payload: bytes) -> float:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"bench.csv\"\r\n"
+        f"Content-Type: text/csv\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        f"{base_url}/api/v1/upload-csv", data=body, method="POST",
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=3600) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def probe(base_url: str, stop: threading.Event, latencies: list, interval: float):
+    while not stop.is_set():
+        started = time.perf_counter()
+        with urllib.request.urlopen(f"{base_url}/api/v1/health-check", timeout=60) as response:
+            response.read()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(interval)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rows", type=int, default=40000)
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="Jeda antar ping health-check (detik)")
+    args = parser.parse_args()
+
+    payload = make_csv(args.rows)
+
+    baseline = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe, args=(args.base_url, stop, baseline, args.probe_interval))
+    prober.start()
+    time.sleep(2)
+    stop.set()
+    prober.join()
+
+    during = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe, args=(args.base_url, stop, during, args.probe_interval))
+    prober.start()
+    elapsed = upload(args.base_url, payload)
+    stop.set()
+    prober.join()
+
+    print(f"Upload {args.rows} rows ({len(payload) / 1e6:.1f} MB): {elapsed:.2f}s -> {args.rows / elapsed:,.0f} rows/s")
+    for name, values in (("idle", baseline), ("during upload", during)):
+        ms = [v * 1000 for v in values]
+        print(
+            f"health-check {name:<14} n={len(ms):<5} p50={percentile(ms, 50):7.1f}ms "
+            f"p95={percentile(ms, 95):7.1f}ms p99={percentile(ms, 99):7.1f}ms max={max(ms):7.1f}ms "
+            f"mean={statistics.mean(ms):6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
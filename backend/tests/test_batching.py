@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from app.batching import MicroBatcher
+from app.feature_encoder import FeatureEncoder
+
+
+def _batcher():
+    encoder = FeatureEncoder(["age", "job_admin.", "job_retired"])
+    # Sama seperti ml_service.predict_many: satu matriks untuk semua record
+    return MicroBatcher("test", lambda records: encoder.encode_records(records).sum(axis=1).tolist(),
+                        max_batch_size=8, max_wait_ms=50)
+
+
+def test_bad_request_does_not_fail_its_batch():
+    batcher = _batcher()
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit({"age": 30, "job": "admin."}),
+            batcher.submit({"age": 40, "job": ["x"]}), # unhashable -> TypeError di encoder
+            batcher.submit({"age": 50, "job": "retired"}),
+            return_exceptions=True,
+        )
+
+    good, bad, other = asyncio.run(main())
+    assert good == 31.0
+    assert other == 51.0
+    assert isinstance(bad, TypeError)
+    assert batcher.stats()["isolated_batches"] == 1
+    assert batcher.stats()["batch_size"]["count"] == 1 # Tetap satu batch, bukan 3 request terpisah
+
+
+def test_single_bad_request_raises():
+    batcher = _batcher()
+    with pytest.raises(TypeError):
+        asyncio.run(batcher.submit({"job": ["x"]}))
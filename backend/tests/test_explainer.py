@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from app.ml_service import ModelBundle
+from app.feature_encoder import FeatureEncoder
+
+
+def _early_stopped_bundle():
+    """Booster 200 tree yang berhenti di best_iteration jauh sebelum tree terakhir"""
+    rng = np.random.default_rng(0)
+    columns = ["age", "campaign", "euribor3m", "nr.employed"]
+    X = rng.normal(size=(600, len(columns)))
+    y = (X[:, 0] + rng.normal(scale=2.0, size=600) > 0).astype(int)
+    train, valid = xgb.DMatrix(X[:400], y[:400]), xgb.DMatrix(X[400:], y[400:])
+    booster = xgb.train(
+        {"objective": "binary:logistic", "max_depth": 4, "eta": 0.3},
+        train, num_boost_round=200, evals=[(valid, "valid")], early_stopping_rounds=5, verbose_eval=False,
+    )
+    assert booster.best_iteration + 1 < booster.num_boosted_rounds()
+
+    bundle = ModelBundle("test", explainer_backend="native")
+    bundle.model = booster
+    bundle.iteration_range = (0, booster.best_iteration + 1)
+    bundle.EXPECTED_COLUMNS = columns
+    bundle.encoder = FeatureEncoder(columns)
+    bundle.init_explainer()
+    return bundle, pd.DataFrame(X[:50], columns=columns)
+
+
+def test_native_explainer_stops_at_best_iteration():
+    bundle, X = _early_stopped_bundle()
+    dmatrix = xgb.DMatrix(X)
+
+    contribs = bundle.model.predict(dmatrix, pred_contribs=True, iteration_range=bundle.iteration_range)
+    margin = bundle.model.predict(dmatrix, output_margin=True, iteration_range=bundle.iteration_range)
+
+    shap_values = bundle.explainer.shap_values(X)
+    np.testing.assert_allclose(shap_values, contribs[:, :-1], rtol=1e-5, atol=1e-6)
+    # Kontribusi + bias = skor (log-odds) yang dipakai predict_proba
+    np.testing.assert_allclose(shap_values.sum(axis=1) + contribs[:, -1], margin, rtol=1e-5, atol=1e-5)
+
+
+def test_native_explainer_differs_from_all_trees():
+    bundle, X = _early_stopped_bundle()
+    all_trees = bundle.model.predict(xgb.DMatrix(X), pred_contribs=True)[:, :-1]
+    assert not np.allclose(bundle.explainer.shap_values(X), all_trees)
@@ -36,7 +36,7 @@ export default function LeadsPage() {
   const fetchLeads = async () => {
     setLoading(true);
     try {
-      let query = `/leads?skip=${page * limit}&limit=${limit}&sort_by=${sortBy}`;
+      let query = `/leads?skip=${page * limit}&limit=${limit}&sort_by=${sortBy}&fields=list`;
       if (filterJob) query += `&job=${filterJob}`;
       if (filterMinScore) query += `&min_score=${Number(filterMinScore) / 100}`;
       if (filterMinAge) query += `&min_age=${filterMinAge}`;